@@ -0,0 +1,482 @@
+"""
+Banco de pruebas de rendimiento del portal (sin cuenta de Google).
+
+Genera hojas de candidatos sintéticas (mismas columnas que 'COLUMN_HEADERS'),
+las sirve con una hoja y un Drive falsos en memoria (con latencia simulada)
+y ejecuta 'main_portal' con el AppTest de Streamlit. Para cada tamaño
+mide cuánto tarda cada recarga, la memoria y las llamadas a la API.
+
+Uso:
+    python benchmark_portal.py                      # 1k, 10k y 100k filas
+    python benchmark_portal.py --filas 1000 --latencia 0 --memoria
+    python benchmark_portal.py --json resultados.json   # para comparar cambios
+    python benchmark_portal.py --importacion            # solo el presupuesto de importación
+    python benchmark_portal.py --almacen gsheet_procesos  # una pestaña por proceso
+    python benchmark_portal.py --almacen sqlite           # base local (importada de la hoja)
+"""
+import argparse
+import builtins
+import io
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from streamlit.testing.v1 import AppTest
+import streamlit as st
+
+CABECERA = ["Archivo", "Clasificación", "Comentarios", "Fecha", "Proceso", "CV_Link", "Estado_Pipeline", "Entrevistas"]
+CABECERA_ENTREVISTAS = ["Archivo", "Link", "Nombre", "Fecha"]
+
+# Repartos aproximados a los de un proceso real
+ESTADOS = {
+    "📥 Nuevo": 35, "👀 En Revisión": 20, "🗓️ Agendar Entrevista": 10, "🎤 Entrevistado": 8,
+    "✅ Aceptado": 3, "❌ Rechazado": 14, "": 10,
+}
+CLASIFICACIONES = {"🌟 Óptimo": 20, "✅ Adecuado": 35, "Descartado (Reclutador)": 45}
+ESTADOS_CON_ENTREVISTA = {"🗓️ Agendar Entrevista", "🎤 Entrevistado", "✅ Aceptado"}
+NOMBRES = ["Ana", "Luis", "María", "José", "Lucía", "Javier", "Sofía", "Pablo", "Elena", "Íñigo"]
+APELLIDOS = ["García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Fernández", "Muñoz"]
+
+
+# ========== GENERADOR DE HOJAS SINTÉTICAS ==========
+
+def generar_hoja(num_filas, semilla=42):
+    """
+    Devuelve (filas de la hoja principal, filas de la pestaña de entrevistas).
+    Hay un proceso por cada ~500 candidatos y unos pocos acaparan la mayoría (como en la realidad).
+    Una parte de las entrevistas va en la celda antigua 'Entrevistas' y el resto en su pestaña.
+    """
+    azar = random.Random(semilla)
+    num_procesos = max(2, num_filas // 500)
+    procesos = [f"Proceso {i:03d}" for i in range(num_procesos)]
+    pesos_procesos = [1 / (i + 1) for i in range(num_procesos)]
+    hoy = date(2025, 1, 1)
+
+    filas = [list(CABECERA)]
+    entrevistas = [list(CABECERA_ENTREVISTAS)]
+    for i in range(num_filas):
+        archivo = f"CV_{azar.choice(NOMBRES)}_{azar.choice(APELLIDOS)}_{i:06d}.pdf"
+        estado = azar.choices(list(ESTADOS), weights=list(ESTADOS.values()))[0]
+        clasificacion = azar.choices(list(CLASIFICACIONES), weights=list(CLASIFICACIONES.values()))[0]
+        celda_entrevistas = ""
+        if estado in ESTADOS_CON_ENTREVISTA:
+            for j in range(azar.choice([0, 1, 1, 2, 3])):
+                link, nombre = f"https://drive.example/{i}_{j}", f"entrevista_{j + 1}.pdf"
+                if azar.random() < 0.3:
+                    celda_entrevistas += f"{';' if celda_entrevistas else ''}{link}|{nombre}"
+                else:
+                    entrevistas.append([archivo, link, nombre, hoy.isoformat()])
+        filas.append([
+            archivo,
+            clasificacion,
+            " ".join(azar.choices(["Buen perfil", "experiencia en Python", "sin inglés", "encaje cultural",
+                                   "salario alto", "disponibilidad inmediata"], k=azar.randint(3, 12))),
+            (hoy - timedelta(days=azar.randint(0, 365))).isoformat(),
+            azar.choices(procesos, weights=pesos_procesos)[0],
+            f"https://drive.example/cv/{i}",
+            estado,
+            celda_entrevistas,
+        ])
+    return filas, entrevistas
+
+
+# ========== GOOGLE FALSO EN MEMORIA ==========
+
+class ApiFalsa:
+    """Latencia y contador de llamadas compartidos por la hoja y el Drive falsos."""
+    def __init__(self, latencia, latencia_por_1000_filas):
+        self.latencia = latencia
+        self.latencia_por_1000_filas = latencia_por_1000_filas
+        self.llamadas = Counter()
+
+    def llamada(self, metodo, filas=0):
+        self.llamadas[metodo] += 1
+        espera = self.latencia + self.latencia_por_1000_filas * filas / 1000
+        if espera:
+            time.sleep(espera)
+
+class HojaFalsa:
+    """Lo que el portal usa de un 'gspread.Worksheet', sobre una lista de listas."""
+    def __init__(self, libro, valores, id_hoja, titulo):
+        self.libro = libro
+        self.valores = valores
+        self.id = id_hoja
+        self.title = titulo
+
+    @property
+    def spreadsheet(self):
+        return self.libro
+
+    def get_all_values(self, *args, **kwargs):
+        self.libro.api.llamada("get_all_values", len(self.valores))
+        return [list(fila) for fila in self.valores]
+
+    def row_values(self, fila):
+        self.libro.api.llamada("row_values")
+        return list(self.valores[fila - 1]) if fila <= len(self.valores) else []
+
+    def col_values(self, columna):
+        self.libro.api.llamada("col_values", len(self.valores))
+        return [fila[columna - 1] if len(fila) >= columna else "" for fila in self.valores]
+
+    def _escribir(self, fila, columna, valor):
+        while len(self.valores) < fila:
+            self.valores.append([""] * len(self.valores[0]))
+        celdas = self.valores[fila - 1]
+        while len(celdas) < columna:
+            celdas.append("")
+        celdas[columna - 1] = valor
+
+    def update_cell(self, fila, columna, valor):
+        self.libro.api.llamada("update_cell")
+        self._escribir(fila, columna, valor)
+        self.libro.revision += 1
+
+    def batch_update(self, datos, **kwargs):
+        import gspread
+        self.libro.api.llamada("batch_update")
+        for dato in datos:
+            fila, columna = gspread.utils.a1_to_rowcol(dato['range'])
+            self._escribir(fila, columna, dato['values'][0][0])
+        self.libro.revision += 1
+
+    def append_row(self, valores, **kwargs):
+        self.append_rows([valores])
+
+    def append_rows(self, filas, **kwargs):
+        self.libro.api.llamada("append_rows")
+        self.valores.extend(list(fila) for fila in filas)
+        self.libro.revision += 1
+
+    # (Solo para preparar el libro con 'migrar_a_hojas_por_proceso')
+    def clear(self):
+        self.libro.api.llamada("clear")
+        self.valores[:] = []
+        self.libro.revision += 1
+
+    def resize(self, rows=None, cols=None):
+        self.libro.api.llamada("resize")
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self.libro.api.llamada("update", len(values))
+        self.valores[:] = [list(fila) for fila in values]
+        self.libro.revision += 1
+
+class LibroFalso:
+    """Lo que el portal usa de un 'gspread.Spreadsheet' (pestañas + fecha de modificación)."""
+    def __init__(self, api, filas, entrevistas):
+        self.api = api
+        self.revision = 1
+        self.hojas = [HojaFalsa(self, filas, 0, "Hoja 1"), HojaFalsa(self, entrevistas, 1, "Entrevistas")]
+
+    def get_lastUpdateTime(self):
+        self.api.llamada("get_lastUpdateTime")
+        return str(self.revision)
+
+    def get_worksheet(self, indice):
+        self.api.llamada("get_worksheet")
+        return self.hojas[indice]
+
+    def worksheet(self, titulo):
+        import gspread
+        self.api.llamada("worksheet")
+        for hoja in self.hojas:
+            if hoja.title == titulo:
+                return hoja
+        raise gspread.exceptions.WorksheetNotFound(titulo)
+
+    def add_worksheet(self, title, rows=1, cols=1):
+        self.api.llamada("add_worksheet")
+        hoja = HojaFalsa(self, [], len(self.hojas), title)
+        self.hojas.append(hoja)
+        return hoja
+
+class PeticionDriveFalsa:
+    def __init__(self, api, media=None, respuesta=None, llamada="drive.list"):
+        self.api = api
+        self.media = media
+        self.posicion = 0
+        self.respuesta = respuesta
+        self.nombre_llamada = llamada
+
+    def next_chunk(self, *args, **kwargs):
+        self.api.llamada("drive.next_chunk")
+        trozo = self.media.getbytes(self.posicion, self.media.chunksize())
+        self.posicion += len(trozo)
+        if self.posicion < self.media.size():
+            return SimpleNamespace(resumable_progress=self.posicion), None
+        self.api.llamada("drive.subido")  # Solo para contar archivos completos
+        return None, self.respuesta
+
+    def execute(self, *args, **kwargs):
+        self.api.llamada(self.nombre_llamada)
+        return self.respuesta
+
+class DriveFalso:
+    """Lo que el portal usa de Drive: subir por trozos, buscar por 'appProperties' y ver si un archivo sigue ahí."""
+    def __init__(self, api):
+        self.api = api
+        self.archivos = 0
+
+    def files(self):
+        return self
+
+    def create(self, body=None, media_body=None, fields=None):
+        self.archivos += 1
+        link = f"https://drive.example/file/d/subido{self.archivos}/view"
+        return PeticionDriveFalsa(self.api, media_body, {'id': str(self.archivos), 'webViewLink': link,
+                                                         'name': body['name']})
+
+    def list(self, **kwargs):
+        return PeticionDriveFalsa(self.api, respuesta={'files': []})
+
+    def get(self, fileId=None, fields=None):
+        return PeticionDriveFalsa(self.api, respuesta={'id': fileId, 'trashed': False}, llamada="drive.get")
+
+class ArchivoSubidoFalso(io.BytesIO):
+    """Imita el 'UploadedFile' de Streamlit (un BytesIO con nombre, tipo y tamaño)."""
+    def __init__(self, contenido, nombre):
+        super().__init__(contenido)
+        self.name = nombre
+        self.type = "application/pdf"
+        self.size = len(contenido)
+
+
+# ========== APP QUE EJECUTA EL APPTEST ==========
+
+def app_benchmark():
+    # (Esta función se ejecuta como script aparte: todo lo que usa va dentro)
+    import builtins
+    import portal_cliente as pc
+    entorno = builtins._BENCHMARK_PORTAL
+    for nombre, valor in entorno["config"].items():
+        setattr(pc.Config, nombre, valor)
+    pc.get_google_creds = lambda token_file: object()
+    pc.connect_to_gsheet = lambda creds: entorno["libro"].hojas[0]
+    pc.ClientesDrive.servicio = lambda self, creds: entorno["drive"]
+    pc.main_portal()
+
+
+# ========== PRESUPUESTO DE IMPORTACIÓN ==========
+
+# Librerías que NO deben cargarse al importar el portal (se importan al usarlas)
+IMPORTS_DIFERIDOS = ["gspread", "googleapiclient", "google_auth_oauthlib", "google_auth_httplib2", "httplib2"]
+
+CODIGO_IMPORTACION = """
+import json, sys, time
+inicio = time.perf_counter()
+import streamlit, pandas
+base = time.perf_counter()
+import portal_cliente
+fin = time.perf_counter()
+print(json.dumps({
+    "base_s": base - inicio,
+    "portal_s": fin - base,
+    "cargados": [m for m in %r if m in sys.modules],
+}))
+"""
+
+def comprobar_importacion(presupuesto, repeticiones=3):
+    """
+    Importa el portal en un proceso limpio (como un contenedor recién arrancado) y
+    comprueba que su propio coste, sin contar streamlit y pandas, cabe en 'presupuesto'
+    segundos y que no arrastra las librerías de Google. Devuelve True si todo va bien.
+    """
+    mediciones = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", CODIGO_IMPORTACION % (IMPORTS_DIFERIDOS,)],
+            capture_output=True, text=True, check=True
+        )
+        mediciones.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+    # La mejor de varias: quita el ruido de la caché de disco
+    mejor = min(mediciones, key=lambda m: m["portal_s"])
+    print(f"Importación: streamlit+pandas {mejor['base_s'] * 1000:.0f} ms, "
+          f"portal_cliente {mejor['portal_s'] * 1000:.1f} ms (presupuesto {presupuesto * 1000:.0f} ms)")
+    correcto = True
+    if mejor["portal_s"] > presupuesto:
+        print("❌ Importar portal_cliente supera el presupuesto")
+        correcto = False
+    if mejor["cargados"]:
+        print(f"❌ Se importan al arrancar: {', '.join(mejor['cargados'])}")
+        correcto = False
+    if correcto:
+        print("✅ Importación dentro del presupuesto")
+    return correcto
+
+
+# ========== ESCENARIOS ==========
+
+def _boton(at, prefijo):
+    for boton in at.button:
+        if boton.key and boton.key.startswith(prefijo):
+            return boton
+    return None
+
+def _medir(at, api, nombre, accion, con_memoria):
+    """Ejecuta una interacción del usuario + la recarga que provoca, y apunta sus costes."""
+    api.llamadas.clear()
+    if con_memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    accion()
+    segundos = time.perf_counter() - inicio
+    pico = None
+    if con_memoria:
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    errores = [e.value for e in at.exception] + [e.value for e in at.error]
+    return {
+        "escenario": nombre,
+        "ms": round(segundos * 1000, 1),
+        "pico_memoria_mb": round(pico / 1e6, 1) if pico is not None else None,
+        "llamadas_api": sum(api.llamadas.values()),
+        "detalle_llamadas": dict(api.llamadas),
+        "errores": errores,
+    }
+
+def ejecutar_tamano(num_filas, args):
+    """Todos los escenarios sobre una hoja de 'num_filas' candidatos (servidor 'en frío')."""
+    filas, entrevistas = generar_hoja(num_filas, args.semilla)
+    api = ApiFalsa(args.latencia, args.latencia_por_1000_filas)
+    libro = LibroFalso(api, filas, entrevistas)
+    if args.almacen == "gsheet_procesos":
+        # El mismo libro repartido con el script de migración (sin contar sus llamadas)
+        import portal_cliente as pc
+        from migrar_a_hojas_por_proceso import migrar
+        latencia, api.latencia, api.latencia_por_1000_filas = api.latencia, 0, 0
+        migrar(libro, pc.LimitadorApi({"sheets": 10 ** 9, "drive": 10 ** 9}), informar=lambda texto: None)
+        api.latencia, api.latencia_por_1000_filas = latencia, args.latencia_por_1000_filas
+        api.llamadas.clear()
+    config_almacen = {}
+    if args.almacen == "sqlite":
+        # Base nueva para cada tamaño, llenada con el script de importación (sin contar sus llamadas)
+        from importar_a_sqlite import importar_hoja
+        directorio = tempfile.mkdtemp(prefix="benchmark_sqlite_")
+        config_almacen["SQLITE_PATH"] = f"{directorio}/talento.db"
+        latencia, api.latencia, api.latencia_por_1000_filas = api.latencia, 0, 0
+        importar_hoja(libro.hojas[0], config_almacen["SQLITE_PATH"])
+        api.latencia, api.latencia_por_1000_filas = latencia, args.latencia_por_1000_filas
+        api.llamadas.clear()
+    builtins._BENCHMARK_PORTAL = {
+        "libro": libro,
+        "drive": DriveFalso(api),
+        "config": {
+            "ALMACEN": args.almacen,
+            "COPIA_LOCAL_PATH": None,       # Cada tamaño empieza sin copia en disco
+            "NIVEL_LOG": "WARNING",         # Sin una línea de métricas por recarga en la salida
+            "SEGUNDOS_LOTE_ESCRITURA": 0,   # Mover guarda al momento (se mide la escritura)
+            "INTERVALO_SONDEO_SEGUNDOS": 0, # Cada recarga consulta la revisión, como en el peor caso
+            **config_almacen,
+        },
+    }
+    st.cache_resource.clear()
+
+    at = AppTest.from_function(app_benchmark, default_timeout=args.timeout)
+    at.secrets["benchmark"] = "1"  # Sin secretos de Google: se usan los falsos
+    resultados = []
+
+    def medir(nombre, accion):
+        resultados.append(_medir(at, api, nombre, accion, args.memoria))
+
+    medir("arranque_en_frio", at.run)
+    medir("recarga_sin_cambios", at.run)
+
+    boton = _boton(at, f"fase_{list(ESTADOS)[3]}")
+    if boton is not None:
+        medir("cambiar_fase", boton.click().run)
+
+    boton = _boton(at, "move_")
+    if boton is not None:
+        medir("mover_candidato", boton.click().run)
+
+    boton = _boton(at, "mas_")
+    if boton is not None:
+        medir("mostrar_mas", boton.click().run)
+
+    if at.sidebar.selectbox and len(at.sidebar.selectbox[0].options) > 1:
+        selector = at.sidebar.selectbox[0]
+        medir("cambiar_proceso", selector.set_value(selector.options[1]).run)
+
+    if at.sidebar.text_input:
+        buscador = at.sidebar.text_input(key="busqueda")
+        medir("buscar_candidato", buscador.set_value("jose garcia").run)
+        medir("buscar_otra_vez", buscador.set_value("lucia entrevista").run)
+
+    # Cambio hecho por otra persona: la siguiente recarga tiene que volver a descargar
+    def hoja_modificada():
+        builtins._BENCHMARK_PORTAL["libro"].revision += 1
+        at.run()
+    medir("recarga_tras_cambio_externo", hoja_modificada)
+
+    # Subida de un informe (sin AppTest: se llama directamente a la función del hilo)
+    import portal_cliente as pc
+    archivo = ArchivoSubidoFalso(b"%PDF-1.4 " + b"0" * args.tamano_pdf, "informe.pdf")
+    tarea = pc.TareaSubida("CV_benchmark.pdf", archivo)
+    medir("subir_entrevista", lambda: pc.subir_entrevista(
+        "CV_benchmark.pdf", archivo, builtins._BENCHMARK_PORTAL["drive"], tarea
+    ))
+
+    memoria_df = sum(
+        cache.df.memory_usage(deep=True).sum() for cache in pc.get_caches_hojas() if cache.df is not None
+    ) / 1e6
+    for resultado in resultados:
+        resultado["filas"] = num_filas
+        resultado["memoria_dataframe_mb"] = round(memoria_df, 1)
+    return resultados
+
+def imprimir_tabla(resultados):
+    print(f"{'filas':>7} {'escenario':<28} {'ms':>9} {'memoria':>9} {'df (MB)':>8} {'llamadas':>9}  detalle")
+    for r in resultados:
+        memoria = f"{r['pico_memoria_mb']:.1f}" if r['pico_memoria_mb'] is not None else "-"
+        detalle = ", ".join(f"{m}×{n}" for m, n in r['detalle_llamadas'].items())
+        print(f"{r['filas']:>7} {r['escenario']:<28} {r['ms']:>9.1f} {memoria:>9} "
+              f"{r['memoria_dataframe_mb']:>8.1f} {r['llamadas_api']:>9}  {detalle}")
+        for error in r['errores']:
+            print(f"{'':>7} ⚠️ {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del Mapa de Talento con Google simulado.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Tamaños de hoja a probar (nº de candidatos)")
+    parser.add_argument("--latencia", type=float, default=0.05,
+                        help="Segundos de latencia de cada llamada a la API simulada")
+    parser.add_argument("--latencia-por-1000-filas", type=float, default=0.01,
+                        help="Segundos extra por cada 1000 filas leídas (tamaño de la respuesta)")
+    parser.add_argument("--tamano-pdf", type=int, default=2 * 1024 * 1024,
+                        help="Bytes del informe en el escenario de subida")
+    parser.add_argument("--memoria", action="store_true",
+                        help="Medir el pico de memoria con tracemalloc (hace todo más lento)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--almacen", choices=["gsheet", "gsheet_procesos", "sqlite"], default="gsheet",
+                        help="Una sola hoja, una pestaña por proceso (repartida con el script de migración) "
+                             "o SQLite (importada con importar_a_sqlite.py)")
+    parser.add_argument("--timeout", type=float, default=600, help="Tiempo máximo por recarga (s)")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--importacion", action="store_true",
+                        help="Solo comprobar el tiempo de importación del portal (sale con error si se pasa)")
+    parser.add_argument("--presupuesto-importacion", type=float, default=0.1,
+                        help="Segundos máximos para importar portal_cliente (sin streamlit ni pandas)")
+    args = parser.parse_args()
+
+    if args.importacion:
+        sys.exit(0 if comprobar_importacion(args.presupuesto_importacion) else 1)
+
+    resultados = []
+    for num_filas in args.filas:
+        resultados.extend(ejecutar_tamano(num_filas, args))
+    imprimir_tabla(resultados)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Llena la base SQLite del portal (ALMACEN = "sqlite") con los candidatos del Google Sheet.
+
+Descarga la hoja principal y su pestaña de entrevistas y lo mete todo en
+'Config.SQLITE_PATH'. Se puede repetir: los candidatos que ya están en la base
+se conservan tal cual (con su fase) y solo entran los nuevos.
+
+Uso:
+    python importar_a_sqlite.py
+    python importar_a_sqlite.py --sqlite otra_base.db
+"""
+import argparse
+import sys
+
+import portal_cliente as pc
+
+
+def importar_hoja(worksheet, ruta):
+    """Copia la hoja (y sus entrevistas) en la base de 'ruta'. Devuelve (filas leídas, candidatos nuevos)."""
+    df, _, _ = pc.descargar_hoja(worksheet, pc.CacheHoja())
+    almacen = pc.AlmacenSQLite(ruta)
+    try:
+        return len(df), almacen.importar(df)
+    finally:
+        almacen.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa el Google Sheet del portal a la base SQLite.")
+    parser.add_argument("--token", default=pc.Config.GDRIVE_TOKEN_FILE, help="token.json de Google (el de auth.py)")
+    parser.add_argument("--sqlite", default=pc.Config.SQLITE_PATH, help="Archivo de la base SQLite")
+    args = parser.parse_args()
+
+    import gspread
+    gestor = pc.GestorCredenciales(token_file=args.token)
+    limitador = pc.get_limitador()
+    libro = limitador.llamar("drive", gspread.authorize(gestor.creds).open, pc.Config.GSHEET_NAME)
+    worksheet = limitador.llamar("sheets", libro.get_worksheet, 0)
+
+    leidas, nuevas = importar_hoja(worksheet, args.sqlite)
+    gestor.detener()
+    print(f"{leidas} candidatos en la hoja, {nuevas} nuevos en {args.sqlite}.")
+    if nuevas:
+        print("Pon ALMACEN = \"sqlite\" en la configuración del portal para usarla.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
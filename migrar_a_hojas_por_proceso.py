@@ -0,0 +1,236 @@
+"""
+Reparte la hoja de candidatos en una pestaña por proceso (para ALMACEN = "gsheet_procesos").
+
+La primera vez crea, por cada proceso, la pestaña 'P_<proceso>' con sus candidatos y
+'P_<proceso> · Entrevistas' con sus informes, la pestaña del buscador
+('Config.HOJA_BUSQUEDA') y al final el manifiesto ('Config.HOJA_MANIFIESTO').
+La hoja original no se toca: queda como copia de seguridad.
+El manifiesto se escribe lo último, así el portal nunca ve un reparto a medias.
+
+Los candidatos nuevos se siguen añadiendo a la hoja original (la primera pestaña):
+para que lleguen al portal hay que volver a ejecutar este script. Si el manifiesto ya
+existe, las pestañas de proceso NO se reescriben (tienen los cambios de fase y los
+informes hechos desde el portal): solo se añaden al final los candidatos que aún no
+están en ninguna, y los procesos nuevos tienen su pestaña nueva. La pestaña del buscador
+se rehace a partir de las pestañas de proceso.
+
+Uso:
+    python migrar_a_hojas_por_proceso.py --dry-run   # solo cuenta, no escribe nada
+    python migrar_a_hojas_por_proceso.py
+"""
+import argparse
+import sys
+
+import portal_cliente as pc
+
+LONGITUD_MAXIMA_TITULO = 100  # Límite de Google Sheets para el nombre de una pestaña
+
+
+def titulos_por_proceso(procesos, ocupados=()):
+    """
+    Título de la pestaña de cada proceso (único, distinto de los 'ocupados' y con sitio
+    para el sufijo de entrevistas).
+    """
+    maximo = LONGITUD_MAXIMA_TITULO - len(pc.SUFIJO_ENTREVISTAS) - 4
+    titulos = {}
+    usados = set(ocupados)
+    for proceso in procesos:
+        base = f"P_{proceso}"[:maximo].strip() or "P_"
+        titulo, n = base, 2
+        while titulo in usados:
+            titulo, n = f"{base} {n}", n + 1
+        usados.add(titulo)
+        titulos[proceso] = titulo
+    return titulos
+
+
+def repartir_por_proceso(valores, entrevistas):
+    """
+    Separa las filas de la hoja principal y de la pestaña de entrevistas por proceso.
+    Recibe y devuelve listas de listas (con la cabecera en la primera fila):
+    {proceso: (filas de candidatos, filas de entrevistas)}, en orden alfabético.
+    """
+    if not valores:
+        return {}
+    cabecera = valores[0]
+    i_archivo, i_proceso = cabecera.index("Archivo"), cabecera.index("Proceso")
+    cabecera_entrevistas = entrevistas[0] if entrevistas else list(pc.COLUMNAS_ENTREVISTAS)
+    i_archivo_entrevista = cabecera_entrevistas.index("Archivo")
+
+    filas_por_proceso = {}
+    proceso_de = {}
+    for fila in valores[1:]:
+        fila = fila + [""] * (len(cabecera) - len(fila))
+        proceso = fila[i_proceso]
+        if not proceso:
+            continue  # Sin proceso no sale en el tablero
+        filas_por_proceso.setdefault(proceso, []).append(fila)
+        proceso_de[fila[i_archivo]] = proceso
+
+    entrevistas_por_proceso = {}
+    for fila in entrevistas[1:]:
+        proceso = proceso_de.get(fila[i_archivo_entrevista]) if len(fila) > i_archivo_entrevista else None
+        if proceso is not None:
+            entrevistas_por_proceso.setdefault(proceso, []).append(fila)
+
+    return {
+        proceso: ([cabecera] + filas_por_proceso[proceso],
+                  [cabecera_entrevistas] + entrevistas_por_proceso.get(proceso, []))
+        for proceso in sorted(filas_por_proceso)
+    }
+
+
+def reordenar(filas, cabecera, cabecera_destino):
+    """Las filas de 'cabecera' con las columnas en el orden de 'cabecera_destino' (vacío si falta)."""
+    indices = [cabecera.index(columna) if columna in cabecera else None for columna in cabecera_destino]
+    return [[fila[i] if i is not None and i < len(fila) else "" for i in indices] for fila in filas]
+
+
+def filas_busqueda(pestanas):
+    """
+    Filas de la pestaña del buscador (cabecera incluida) a partir de las pestañas de
+    proceso (listas de listas con su cabecera): los candidatos que se ven en el tablero.
+    """
+    visibles = {categoria['label'] for categoria in pc.CATEGORIES}
+    i_clasificacion = pc.COLUMNAS_BUSQUEDA.index("Clasificación")
+    filas = [list(pc.COLUMNAS_BUSQUEDA)]
+    for valores in pestanas:
+        if not valores:
+            continue
+        filas.extend(
+            fila for fila in reordenar(valores[1:], valores[0], pc.COLUMNAS_BUSQUEDA)
+            if fila[i_clasificacion] in visibles
+        )
+    return filas
+
+
+def escribir_pestana(libro, titulo, valores, limitador):
+    """Deja la pestaña 'titulo' con exactamente 'valores' (la crea si no existe). Una escritura."""
+    from gspread.exceptions import WorksheetNotFound
+    filas, columnas = max(len(valores), 1), max(len(valores[0]), 1)
+    try:
+        hoja = limitador.llamar("sheets", libro.worksheet, titulo)
+        limitador.llamar("sheets", hoja.clear)
+        limitador.llamar("sheets", hoja.resize, rows=filas, cols=columnas)
+    except WorksheetNotFound:
+        hoja = limitador.llamar("sheets", libro.add_worksheet, title=titulo, rows=filas, cols=columnas)
+    limitador.llamar("sheets", hoja.update, values=valores, range_name="A1")
+    return hoja
+
+
+def anadir_filas(libro, titulo, cabecera, filas, limitador):
+    """Añade 'filas' al final de la pestaña 'titulo' sin tocar lo que ya tiene (la crea si no existe)."""
+    from gspread.exceptions import WorksheetNotFound
+    try:
+        hoja = limitador.llamar("sheets", libro.worksheet, titulo)
+    except WorksheetNotFound:
+        return escribir_pestana(libro, titulo, [cabecera] + filas, limitador)
+    limitador.llamar("sheets", hoja.append_rows, filas, idempotente=False)
+    return hoja
+
+
+def leer_manifiesto(libro, limitador):
+    """{proceso: pestaña} del manifiesto ya escrito ({} si todavía no se ha repartido nunca)."""
+    from gspread.exceptions import WorksheetNotFound
+    try:
+        hoja = limitador.llamar("sheets", libro.worksheet, pc.Config.HOJA_MANIFIESTO)
+    except WorksheetNotFound:
+        return {}
+    valores = limitador.llamar("sheets", hoja.get_all_values)
+    cabecera = valores[0] if valores else []
+    if "Proceso" not in cabecera or "Hoja" not in cabecera:
+        # Mejor no tocar nada que reescribir pestañas con datos del portal
+        raise ValueError(f"La pestaña '{pc.Config.HOJA_MANIFIESTO}' no tiene las columnas 'Proceso' y 'Hoja'.")
+    i_proceso, i_hoja = cabecera.index("Proceso"), cabecera.index("Hoja")
+    return {fila[i_proceso]: fila[i_hoja] for fila in valores[1:] if len(fila) > i_hoja and fila[i_hoja]}
+
+
+def migrar(libro, limitador, dry_run=False, informar=print):
+    """
+    Reparte el libro abierto, o completa un reparto anterior con los candidatos nuevos
+    de la hoja original. Devuelve el manifiesto escrito (o que se escribiría).
+    """
+    from gspread.exceptions import WorksheetNotFound
+    valores = limitador.llamar("sheets", libro.get_worksheet(0).get_all_values)
+    try:
+        hoja_entrevistas = limitador.llamar("sheets", libro.worksheet, pc.Config.HOJA_ENTREVISTAS)
+        entrevistas = limitador.llamar("sheets", hoja_entrevistas.get_all_values)
+    except WorksheetNotFound:
+        entrevistas = []
+    reparto = repartir_por_proceso(valores, entrevistas)
+
+    # Lo que ya está repartido (con los cambios hechos desde el portal) no se toca
+    actuales = leer_manifiesto(libro, limitador)
+    pestanas = {}  # Título -> filas que tendrá (cabecera incluida)
+    for titulo in actuales.values():
+        hoja = limitador.llamar("sheets", libro.worksheet, titulo)
+        pestanas[titulo] = limitador.llamar("sheets", hoja.get_all_values)
+    repartidos = set()
+    for filas in pestanas.values():
+        if filas and "Archivo" in filas[0]:
+            i_archivo = filas[0].index("Archivo")
+            repartidos.update(fila[i_archivo] for fila in filas[1:] if len(fila) > i_archivo)
+
+    titulos = dict(actuales)
+    titulos.update(titulos_por_proceso([p for p in reparto if p not in actuales], ocupados=actuales.values()))
+    for proceso, (filas, filas_entrevistas) in reparto.items():
+        cabecera, cabecera_entrevistas = filas[0], filas_entrevistas[0]
+        i_archivo, i_archivo_entrevista = cabecera.index("Archivo"), cabecera_entrevistas.index("Archivo")
+        nuevas = [fila for fila in filas[1:] if fila[i_archivo] not in repartidos]
+        if not nuevas:
+            continue
+        archivos_nuevos = {fila[i_archivo] for fila in nuevas}
+        nuevas_entrevistas = [fila for fila in filas_entrevistas[1:] if fila[i_archivo_entrevista] in archivos_nuevos]
+        titulo = titulos[proceso]
+        titulo_entrevistas = f"{titulo}{pc.SUFIJO_ENTREVISTAS}"
+
+        if titulo in pestanas:
+            # Proceso ya repartido: solo se añaden los candidatos nuevos (en el orden de sus columnas)
+            cabecera_pestana = pestanas[titulo][0] if pestanas[titulo] else cabecera
+            nuevas = reordenar(nuevas, cabecera, cabecera_pestana)
+            informar(f"{titulo}: +{len(nuevas)} candidatos, +{len(nuevas_entrevistas)} entrevistas")
+            if not dry_run:
+                anadir_filas(libro, titulo, cabecera_pestana, nuevas, limitador)
+                if nuevas_entrevistas:
+                    anadir_filas(libro, titulo_entrevistas, cabecera_entrevistas, nuevas_entrevistas, limitador)
+            pestanas[titulo] = (pestanas[titulo] or [cabecera_pestana]) + nuevas
+        else:
+            informar(f"{titulo}: {len(nuevas)} candidatos, {len(nuevas_entrevistas)} entrevistas")
+            if not dry_run:
+                escribir_pestana(libro, titulo, [cabecera] + nuevas, limitador)
+                escribir_pestana(libro, titulo_entrevistas, [cabecera_entrevistas] + nuevas_entrevistas, limitador)
+            pestanas[titulo] = [cabecera] + nuevas
+
+    manifiesto = [list(pc.COLUMNAS_MANIFIESTO)]
+    for proceso in sorted(titulos):
+        if titulos[proceso] in pestanas:
+            manifiesto.append([proceso, titulos[proceso], max(len(pestanas[titulos[proceso]]) - 1, 0)])
+
+    busqueda = filas_busqueda(pestanas.values())
+    informar(f"{pc.Config.HOJA_BUSQUEDA}: {len(busqueda) - 1} candidatos")
+    if not dry_run:
+        escribir_pestana(libro, pc.Config.HOJA_BUSQUEDA, busqueda, limitador)
+        escribir_pestana(libro, pc.Config.HOJA_MANIFIESTO, manifiesto, limitador)
+    return manifiesto
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reparte el Google Sheet del portal en una pestaña por proceso.")
+    parser.add_argument("--token", default=pc.Config.GDRIVE_TOKEN_FILE, help="token.json de Google (el de auth.py)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar el reparto, sin escribir")
+    args = parser.parse_args()
+
+    import gspread
+    gestor = pc.GestorCredenciales(token_file=args.token)
+    limitador = pc.LimitadorApi(pc.Config.CUOTA_POR_MINUTO)
+    libro = limitador.llamar("drive", gspread.authorize(gestor.creds).open, pc.Config.GSHEET_NAME)
+
+    manifiesto = migrar(libro, limitador, dry_run=args.dry_run)
+    gestor.detener()
+    print(f"{len(manifiesto) - 1} procesos" + (" (sin escribir: --dry-run)" if args.dry_run else ""))
+    if not args.dry_run:
+        print("Listo. Pon ALMACEN = \"gsheet_procesos\" en la configuración del portal.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,269 +1,2366 @@
 import streamlit as st
 import pandas as pd
-import gspread
+import numpy as np
 import time
 import os
+import sys
 import warnings
 import io
 import json # Importante para leer los secretos
+import re
+import bisect
+import unicodedata
+from datetime import datetime, timezone
+import hashlib
+import random
+import threading
+import sqlite3
+import logging
+import uuid
+import tempfile
+import zipfile
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError, as_completed
 
-# --- INICIO: IMPORTS PARA GOOGLE (OAuth) ---
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-# --- FIN: IMPORTS PARA GOOGLE ---
+# --- IMPORTS PARA GOOGLE ---
+# gspread y las librerías de Google tardan bastante en importarse: se importan
+# dentro de las funciones que las usan, la primera vez que hacen falta.
+# Las credenciales se leen de los 'Secrets' en memoria (ver 'get_google_creds').
 
 
-# --- ★★★ INICIO: BLOQUE PARA DESPLIEGUE EN STREAMLIT CLOUD ★★★ ---
-# (Este es el código que hemos añadido para leer los "Secrets")
+# Ignorar advertencias comunes
+warnings.filterwarnings('ignore', category=FutureWarning)
+
+logger = logging.getLogger("mapa_talento")
+
+# ========== CONFIGURACIÓN ==========
+class Config:
+    # 1. El token que creaste con auth.py
+    # (Solo en local: en la nube se lee del secreto 'GOOGLE_TOKEN', sin escribir archivos)
+    GDRIVE_TOKEN_FILE = "token.json"
+    
+    # 2. El nombre EXACTO de tu Google Sheet
+    GSHEET_NAME = "BaseDeDatos_TalentHub" # <-- REEMPLAZA ESTO
+    
+    # 3. ID de la carpeta donde se guardarán las entrevistas (OPCIONAL)
+    ENTREVISTAS_FOLDER_ID = None  # <-- Si usas una carpeta específica, pon su ID aquí
+    
+    # 4. Cada cuántos segundos se pregunta a Drive si la hoja ha cambiado ('modifiedTime').
+    #    La hoja completa solo se vuelve a descargar si la revisión ha cambiado.
+    INTERVALO_SONDEO_SEGUNDOS = 15
+    
+    # 5. Si no se puede consultar la revisión, se recarga la hoja cada estos segundos
+    CACHE_TTL_SEGUNDOS = 60
+    
+    # 6. Dónde viven los candidatos: "gsheet" (Google Sheets), "gsheet_procesos"
+    #    (Google Sheets, una pestaña por proceso; ver nº 16) o "sqlite" (archivo local)
+    ALMACEN = "gsheet"
+    SQLITE_PATH = "talento.db"
+    
+    # 7. Los cambios de fase se acumulan y se guardan juntos (un solo 'batch_update')
+    #    pasados estos segundos, o antes si se pulsa "Aplicar cambios". 0 = al momento.
+    #    Los guarda un hilo del servidor: no se pierden aunque se cierre la pestaña.
+    SEGUNDOS_LOTE_ESCRITURA = 10
+    
+    # 8. Cuántas fichas se dibujan de golpe en cada columna ("Mostrar más" añade otras tantas)
+    TARJETAS_POR_PAGINA = 20
+    
+    # 9. Subidas de entrevistas en segundo plano: hilos en paralelo y tamaño de cada trozo
+    #     (la subida es reanudable; el trozo tiene que ser múltiplo de 256 KB)
+    SUBIDA_HILOS = 4
+    SUBIDA_CHUNK_BYTES = 1024 * 1024
+    
+    # 10. Hoja (pestaña del mismo Google Sheet) con UNA fila por informe de entrevista.
+    #     Se crea sola si no existe. La antigua celda 'Entrevistas' se sigue leyendo.
+    HOJA_ENTREVISTAS = "Entrevistas"
+    
+    # 11. Cuota de la API de Google (peticiones por minuto, para TODO el servidor).
+    #     Si se acaba, las llamadas esperan su turno en vez de fallar.
+    CUOTA_POR_MINUTO = {"sheets": 60, "drive": 600}
+    #     Ante un 429/5xx se reintenta esperando 1s, 2s, 4s... (+ un poco al azar)
+    REINTENTOS_API = 5
+    ESPERA_MAXIMA_REINTENTO = 32
+    
+    # 12. Copia local (parquet) de la última hoja descargada. Al arrancar se muestra al
+    #     momento mientras se descarga la hoja en segundo plano, y se usa si Google falla.
+    #     None = sin copia local.
+    COPIA_LOCAL_PATH = "copia_hoja.parquet"
+    
+    # 13. Panel de rendimiento en el sidebar (tiempos de cada recarga, llamadas a la API
+    #     y bytes). Los mismos datos se escriben siempre en el log como JSON (una línea por
+    #     recarga, en la salida de error, como el log de Streamlit) si el nivel es "INFO".
+    MODO_DEPURACION = False
+    NIVEL_LOG = "INFO"
+    
+    # 14. El token de Google se renueva en segundo plano estos segundos ANTES de caducar
+    #     (ninguna sesión espera a que se renueve). Si falla, se reintenta a los 30 s.
+    MARGEN_REFRESCO_TOKEN_SEGUNDOS = 300
+    
+    # 15. Buscador del sidebar: cuántos resultados se muestran como mucho
+    RESULTADOS_BUSQUEDA = 20
+    
+    # 16. Con ALMACEN = "gsheet_procesos" cada proceso tiene su propia pestaña (y su
+    #     pestaña de entrevistas) y solo se descarga la del proceso seleccionado.
+    #     Esta pestaña (el "manifiesto") dice en qué pestaña está cada proceso.
+    #     Para repartir una hoja existente: python migrar_a_hojas_por_proceso.py
+    #     El buscador usa otra pestaña pequeña con el nombre, el proceso y la fase de
+    #     todos los candidatos (busca solo por nombre: no baja ninguna pestaña de proceso).
+    HOJA_MANIFIESTO = "Procesos"
+    HOJA_BUSQUEDA = "Buscador"
+    
+    # 17. Exportar shortlist (Excel + informes en .zip): PDFs que se descargan de Drive
+    #     a la vez (hilos compartidos por todas las sesiones) y tamaño de cada trozo.
+    #     Cada informe va a disco trozo a trozo, nunca entero en memoria.
+    #     Streamlit guarda en memoria el .zip terminado para servirlo: por eso tiene un
+    #     tamaño máximo (lo que no cabe se lista en 'OMITIDOS.txt' dentro del .zip).
+    EXPORTACION_HILOS = 4
+    EXPORTACION_CHUNK_BYTES = 1024 * 1024
+    EXPORTACION_MAX_MB = 150
+    
+# Definimos los "permisos" (necesitamos leer y escribir)
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Definimos las columnas que esperamos leer
+COLUMN_HEADERS = ["Archivo", "Clasificación", "Comentarios", "Fecha", "Proceso", "CV_Link", "Estado_Pipeline", "Entrevistas"]
+
+# --- ¡NUEVO! DEFINICIÓN DEL PIPELINE ---
+# Estas son las FASES de tu tablero
+PIPELINE_STAGES = [
+    "📥 Nuevo",
+    "👀 En Revisión",
+    "🗓️ Agendar Entrevista",
+    "🎤 Entrevistado",
+    "✅ Aceptado"
+]
+RECHAZADO_STAGE = "❌ Rechazado"
+
+# Fases donde se permiten subir entrevistas
+FASES_ENTREVISTA = ["🗓️ Agendar Entrevista", "🎤 Entrevistado", "✅ Aceptado"]
+
+# Columnas de la hoja/tabla de entrevistas (una fila por informe)
+COLUMNAS_ENTREVISTAS = ["Archivo", "Link", "Nombre", "Fecha"]
+
+# Hojas por proceso: columnas del manifiesto y nombre de la pestaña de entrevistas de cada una
+COLUMNAS_MANIFIESTO = ["Proceso", "Hoja", "Candidatos"]
+COLUMNAS_BUSQUEDA = ["Archivo", "Proceso", "Clasificación", "Estado_Pipeline"]
+SUFIJO_ENTREVISTAS = " · Entrevistas"
+
+# Columnas con pocos valores distintos: se guardan como 'category' (mucha menos memoria)
+COLUMNAS_CATEGORICAS = ["Proceso", "Estado_Pipeline", "Clasificación"]
+
+# Traemos tus categorías para usar los colores
+CATEGORIES = [
+    {"label": "🌟 Óptimo", "color": "#D4ADFC"},
+    {"label": "✅ Adecuado", "color": "#A0E7E5"},
+]
+
+# ========== MÉTRICAS DE RENDIMIENTO ==========
+
+class MetricasSesion:
+    """
+    Tiempos y llamadas a la API de UNA sesión: los de la recarga en curso,
+    los de la última recarga terminada y los acumulados desde que se abrió.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.id = uuid.uuid4().hex[:8]
+        self.recarga = self._recarga_vacia()
+        self.ultima = None
+        self.llamadas_totales = Counter()
+        self.bytes_totales = 0
+        self.recargas = 0
+
+    @staticmethod
+    def _recarga_vacia():
+        ahora = time.perf_counter()
+        return {"fases": {}, "veces": Counter(), "llamadas": Counter(), "bytes": 0,
+                "inicio": ahora, "marca": ahora, "total": 0.0}
+
+    def empezar(self):
+        self.recarga["inicio"] = self.recarga["marca"] = time.perf_counter()
+
+    def marcar(self, fase):
+        """Apunta a 'fase' el tiempo desde la marca anterior (para secciones seguidas de código)."""
+        ahora = time.perf_counter()
+        self.sumar_tiempo(fase, ahora - self.recarga["marca"])
+        self.recarga["marca"] = ahora
+
+    def sumar_tiempo(self, fase, segundos):
+        with self._lock:
+            fases = self.recarga["fases"]
+            fases[fase] = fases.get(fase, 0.0) + segundos
+            self.recarga["veces"][fase] += 1
+
+    def sumar_llamada(self, metodo, num_bytes=0):
+        with self._lock:
+            self.recarga["llamadas"][metodo] += 1
+            self.recarga["bytes"] += num_bytes
+            self.llamadas_totales[metodo] += 1
+            self.bytes_totales += num_bytes
+
+    def cerrar_recarga(self):
+        """Da por terminada la recarga: la guarda como 'ultima' y la escribe en el log."""
+        with self._lock:
+            self.recarga["total"] = time.perf_counter() - self.recarga["inicio"]
+            self.ultima, self.recarga = self.recarga, self._recarga_vacia()
+            self.recargas += 1
+        logger.info(json.dumps({
+            "evento": "recarga",
+            "sesion": self.id,
+            "total_ms": round(self.ultima["total"] * 1000, 1),
+            "fases_ms": {fase: round(seg * 1000, 1) for fase, seg in self.ultima["fases"].items()},
+            "fichas": self.ultima["veces"]["fichas"],
+            "llamadas_api": dict(self.ultima["llamadas"]),
+            "bytes_api": self.ultima["bytes"],
+        }, ensure_ascii=False))
+
+@st.cache_resource
+def get_metricas_por_hilo():
+    """
+    Métricas de la sesión que está usando cada hilo (el del script o uno de subida).
+    Va en 'cache_resource' porque Streamlit vuelve a ejecutar este archivo en cada
+    recarga: una variable global normal sería otra distinta cada vez.
+    """
+    return threading.local()
+
+def usar_metricas(metricas):
+    get_metricas_por_hilo().actual = metricas
+
+def metricas_del_hilo():
+    return getattr(get_metricas_por_hilo(), 'actual', None)
+
+def get_metricas_sesion():
+    """Métricas de la sesión actual (y las deja apuntadas para este hilo)."""
+    if 'metricas' not in st.session_state:
+        st.session_state.metricas = MetricasSesion()
+    usar_metricas(st.session_state.metricas)
+    return st.session_state.metricas
+
+@contextmanager
+def medir(fase):
+    """Suma a 'fase' lo que tarde el bloque (si el hilo tiene métricas asociadas)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas = metricas_del_hilo()
+        if metricas is not None:
+            metricas.sumar_tiempo(fase, time.perf_counter() - inicio)
+
+def tamano_aproximado(resultado):
+    """Bytes aproximados de una respuesta de la API (solo se calcula en modo depuración)."""
+    if isinstance(resultado, list):
+        return sum(tamano_aproximado(valor) for valor in resultado)
+    if isinstance(resultado, str):
+        return len(resultado.encode("utf-8"))
+    if isinstance(resultado, dict):
+        return len(json.dumps(resultado, default=str))
+    return 0
+
+# ========== LÍMITE DE LLAMADAS A GOOGLE (CUOTA) ==========
+
+# Errores de Google que merece la pena reintentar (cuota agotada o fallo temporal)
+CODIGOS_REINTENTABLES = {408, 429, 500, 502, 503, 504}
+
+def codigo_http(error):
+    """Código HTTP de un error de gspread o de googleapiclient (None si no es de la API)."""
+    respuesta = getattr(error, 'response', None)   # gspread.exceptions.APIError
+    if respuesta is not None and hasattr(respuesta, 'status_code'):
+        return respuesta.status_code
+    resp = getattr(error, 'resp', None)             # googleapiclient.errors.HttpError
+    if resp is not None and hasattr(resp, 'status'):
+        return int(resp.status)
+    return None
+
+def error_de_red(error):
+    """
+    ¿Fallo de red pasajero, sin respuesta de Google? googleapiclient da los de Python;
+    gspread, los de 'requests' (que no heredan de ellos). Solo se mira 'requests' si ya
+    está importado: si no lo está, el error no puede ser suyo.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    requests = sys.modules.get("requests")
+    return requests is not None and isinstance(error, (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    ))
+
+class CubetaTokens:
+    """Cubeta de tokens: 'capacidad' peticiones por minuto, que se van recargando poco a poco."""
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self.tokens = float(capacidad)
+        self.actualizado = time.monotonic()
+
+    def _recargar(self, ahora):
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.actualizado) * self.capacidad / 60)
+        self.actualizado = ahora
+
+    def tomar(self):
+        """Gasta un token. Si no hay, devuelve cuántos segundos faltan para el siguiente."""
+        self._recargar(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * 60 / self.capacidad
+
+    def vaciar(self):
+        """Google ha dicho 429: dejamos de gastar hasta que se recargue."""
+        self._recargar(time.monotonic())
+        self.tokens = min(self.tokens, 0.0)
+
+class LimitadorApi:
+    """
+    Única puerta de salida hacia Sheets y Drive para todas las sesiones e hilos:
+    - respeta la cuota por minuto ('Config.CUOTA_POR_MINUTO') esperando su turno,
+    - reintenta los 429/5xx y fallos de red con espera exponencial + azar
+      (lo que no es idempotente, como añadir filas, solo los 429: ahí Google no hizo nada),
+    - junta lecturas idénticas en vuelo (misma 'clave') en una sola llamada.
+    """
+    def __init__(self, cuotas):
+        self._lock = threading.Lock()
+        self.cubetas = {api: CubetaTokens(cuota) for api, cuota in cuotas.items()}
+        self._en_curso = {}  # clave -> Future de la lectura que ya está en marcha
+        self.reintentos = 0
+        self.agrupadas = 0
+        self.llamadas = Counter()  # "api.método" -> nº de llamadas (todo el servidor)
+
+    def margen(self, api):
+        """Fracción de la cuota por minuto que queda libre ahora mismo (0.0 - 1.0)."""
+        with self._lock:
+            cubeta = self.cubetas[api]
+            cubeta._recargar(time.monotonic())
+            return max(cubeta.tokens, 0.0) / cubeta.capacidad
+
+    def _esperar_turno(self, api):
+        while True:
+            with self._lock:
+                espera = self.cubetas[api].tomar()
+            if not espera:
+                return
+            time.sleep(espera)
+
+    def _con_reintentos(self, api, funcion, args, kwargs, idempotente=True):
+        for intento in range(Config.REINTENTOS_API + 1):
+            self._esperar_turno(api)
+            try:
+                resultado = funcion(*args, **kwargs)
+                self._apuntar(api, funcion, resultado)
+                return resultado
+            except Exception as e:
+                codigo = codigo_http(e)
+                if idempotente:
+                    reintentable = codigo in CODIGOS_REINTENTABLES or (codigo is None and error_de_red(e))
+                else:
+                    # Un 5xx o un corte pueden llegar con la escritura ya hecha: repetirla la duplicaría
+                    reintentable = codigo == 429
+                if not reintentable or intento == Config.REINTENTOS_API:
+                    raise
+                if codigo == 429:
+                    with self._lock:
+                        self.cubetas[api].vaciar()
+                espera = min(2 ** intento, Config.ESPERA_MAXIMA_REINTENTO) + random.uniform(0, 1)
+                with self._lock:
+                    self.reintentos += 1
+                logger.warning("API %s respondió %s; reintento %d en %.1fs", api, codigo or e, intento + 1, espera)
+                time.sleep(espera)
+
+    def _apuntar(self, api, funcion, resultado):
+        """Cuenta la llamada para el servidor y para la sesión del hilo que la hizo."""
+        metodo = f"{api}.{getattr(funcion, '__name__', 'llamada')}"
+        with self._lock:
+            self.llamadas[metodo] += 1
+        metricas = metricas_del_hilo()
+        if metricas is not None:
+            num_bytes = tamano_aproximado(resultado) if Config.MODO_DEPURACION else 0
+            metricas.sumar_llamada(metodo, num_bytes)
+
+    def llamar(self, api, funcion, *args, clave=None, idempotente=True, **kwargs):
+        """
+        Ejecuta 'funcion(*args, **kwargs)' contra la API 'api' ("sheets" o "drive").
+        Con 'clave', las llamadas iguales que lleguen mientras esta está en vuelo
+        reciben el mismo resultado (solo para LECTURAS). 'idempotente=False' para
+        las llamadas que no se pueden repetir sin efecto doble (p.ej. 'append_rows').
+        """
+        if clave is None:
+            return self._con_reintentos(api, funcion, args, kwargs, idempotente)
+        
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            propia = futuro is None
+            if propia:
+                futuro = self._en_curso[clave] = Future()
+            else:
+                self.agrupadas += 1
+        if not propia:
+            return futuro.result()
+        
+        try:
+            resultado = self._con_reintentos(api, funcion, args, kwargs)
+            futuro.set_result(resultado)
+            return resultado
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+
+@st.cache_resource
+def get_limitador():
+    """Limitador de llamadas a Google compartido por todo el servidor."""
+    return LimitadorApi(Config.CUOTA_POR_MINUTO)
+
+# ========== CONEXIÓN A GOOGLE SHEETS (OAuth) ==========
+
+@st.cache_resource
+def leer_token_de_secrets():
+    """
+    Token de Google guardado en los 'Secrets' (como dict), leído UNA vez por servidor.
+    None si no hay secretos (p.ej. en local, donde se usa el token.json).
+    """
+    try:
+        token = st.secrets.get("GOOGLE_TOKEN")
+    except FileNotFoundError:  # No hay secrets.toml
+        return None
+    if not token:
+        return None
+    return json.loads(token) if isinstance(token, str) else dict(token)
+
+class GestorCredenciales:
+    """
+    Credenciales de Google compartidas por todas las sesiones.
+    Un hilo las renueva antes de que caduquen (con 'Config.MARGEN_REFRESCO_TOKEN_SEGUNDOS'
+    de margen) y las cambia de golpe por unas nuevas: nadie espera a un refresco y solo
+    ese hilo escribe el token.json (en local). Al rotar, se rehacen la conexión al
+    GSheet y los clientes de Drive.
+    """
+    def __init__(self, info_token=None, token_file=None):
+        from google.oauth2.credentials import Credentials
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self.token_file = token_file if info_token is None else None  # Solo se escribe en local
+        if info_token is not None:
+            creds = Credentials.from_authorized_user_info(info_token, SCOPES)
+        else:
+            creds = Credentials.from_authorized_user_file(token_file, SCOPES)
+        self.creds = creds
+        self.rotaciones = 0
+        
+        # Arranque: si ya viene caducado, se renueva aquí (una sola vez por servidor)
+        if not creds.valid:
+            self.refrescar(invalidar=False)
+        
+        threading.Thread(target=self._bucle, name="refresco_token", daemon=True).start()
+
+    def _segundos_hasta_refresco(self):
+        expiry = self.creds.expiry  # UTC sin zona horaria (así lo da google-auth)
+        if expiry is None:
+            return Config.MARGEN_REFRESCO_TOKEN_SEGUNDOS
+        ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+        return max((expiry - ahora).total_seconds() - Config.MARGEN_REFRESCO_TOKEN_SEGUNDOS, 0)
+
+    def _bucle(self):
+        while not self._parar.wait(self._segundos_hasta_refresco()):
+            try:
+                self.refrescar()
+            except Exception as e:
+                logger.warning("No se pudo renovar el token de Google: %s", e)
+                if self._parar.wait(30):
+                    return
+
+    def refrescar(self, invalidar=True):
+        """Pide un token nuevo sobre una COPIA y la publica (las sesiones nunca ven una a medias)."""
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
+        with self._lock:
+            nuevas = Credentials.from_authorized_user_info(json.loads(self.creds.to_json()), SCOPES)
+            nuevas.refresh(Request())
+            self.creds = nuevas
+            self.rotaciones += 1
+            if self.token_file and os.access(os.path.dirname(os.path.abspath(self.token_file)), os.W_OK):
+                temporal = f"{self.token_file}.tmp"
+                with open(temporal, 'w') as token:
+                    token.write(nuevas.to_json())
+                os.replace(temporal, self.token_file)
+        logger.info("Token de Google renovado (caduca %s)", nuevas.expiry)
+        if invalidar:
+            invalidar_clientes_google()
+
+    def detener(self):
+        self._parar.set()
+
+@st.cache_resource
+def get_gestor_credenciales(token_file):
+    """Un solo gestor por servidor. Si no hay token, lanza (y no se cachea)."""
+    info_token = leer_token_de_secrets()
+    if info_token is None and not os.path.exists(token_file):
+        raise FileNotFoundError(token_file)
+    return GestorCredenciales(info_token, token_file)
+
+def invalidar_clientes_google():
+    """Tras rotar las credenciales: la próxima vez se rehacen la conexión y los clientes."""
+    connect_to_gsheet.clear()
+    for cache in get_caches_hojas():
+        cache.worksheet = cache.hoja_entrevistas = None
+    get_manifiesto().hoja = None
+    get_clientes_drive().invalidar()
+
+def get_google_creds(token_file):
+    """Credenciales de Google: del secreto 'GOOGLE_TOKEN' (en memoria) o del token.json local."""
+    try:
+        return get_gestor_credenciales(token_file).creds
+    except FileNotFoundError:
+        # Este error ahora solo debería aparecer en local si borras el token
+        st.error(f"Error: No se encuentra el archivo de sesión '{token_file}'.")
+        st.info("Asegúrate de que tus 'Secrets' de Streamlit Cloud están bien configurados.")
+        return None
+    except Exception as e:
+        st.error(f"Error al refrescar el token: {e}. Vuelve a autenticarte localmente o revisa los 'Secrets'.")
+        return None
+
+@st.cache_resource(ttl=600)
+def connect_to_gsheet(_creds):
+    """Conecta con Google Sheets."""
+    if _creds is None: return None
+    try:
+        import gspread
+        limitador = get_limitador()
+        gc = gspread.authorize(_creds)
+        sh = limitador.llamar("drive", gc.open, Config.GSHEET_NAME)
+        worksheet = limitador.llamar("sheets", sh.get_worksheet, 0)  # = sh.sheet1
+        return worksheet
+    except Exception as e:
+        st.error(f"Error conectando con Google Sheets: {e}")
+        return None
+
+# --- TIPOS DEL DATAFRAME (se normalizan UNA vez al cargar) ---
+def normalizar_tipos(df):
+    """
+    Deja el DataFrame listo para todas las sesiones: columnas categóricas,
+    'Fecha' ya convertida a fecha y filas ordenadas de más reciente a más antigua.
+    """
+    memoria_antes = df.memory_usage(deep=True).sum()
+    df = df.copy()
+    for col in COLUMNAS_CATEGORICAS:
+        df[col] = df[col].astype("category")
+    df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce')
+    df = df.sort_values(by="Fecha", ascending=False, kind="stable")
+    memoria_despues = df.memory_usage(deep=True).sum()
+    logger.info(
+        "Datos normalizados: %d filas, %.1f MB (antes %.1f MB)",
+        len(df), memoria_despues / 1e6, memoria_antes / 1e6
+    )
+    return df
+
+def asignar_valor(df, filas, columna, valor):
+    """'df.loc[filas, columna] = valor', añadiendo la categoría si la columna es categórica."""
+    if isinstance(df[columna].dtype, pd.CategoricalDtype) and valor not in df[columna].cat.categories:
+        df[columna] = df[columna].cat.add_categories([valor])
+    if isinstance(valor, tuple):
+        df.at[filas, columna] = valor  # Una sola celda (p.ej. las entrevistas de un candidato)
+    else:
+        df.loc[filas, columna] = valor
+
+# --- ENTREVISTAS: una fila por informe, agrupadas por candidato al cargar ---
+def parsear_celda_entrevistas(texto):
+    """Formato antiguo de la celda 'link|nombre;link|nombre' -> ((link, nombre), ...)."""
+    if not isinstance(texto, str) or not texto.strip():
+        return ()
+    return tuple(
+        tuple(entrevista.split("|", 1))
+        for entrevista in texto.split(";") if "|" in entrevista
+    )
+
+def entrevistas_nuevas(entrevistas, links_actuales):
+    """Las (link, nombre) cuyo link aún no está apuntado (tampoco repetido dentro del propio lote)."""
+    vistos = set(links_actuales)
+    nuevas = []
+    for link, nombre in entrevistas:
+        if link not in vistos:
+            vistos.add(link)
+            nuevas.append((link, nombre))
+    return tuple(nuevas)
+
+def agrupar_entrevistas(df, filas_entrevistas):
+    """
+    Deja en la columna 'Entrevistas' de cada candidato una tupla de (link, nombre):
+    lo que hubiera en la celda antigua + sus filas de la hoja/tabla de entrevistas.
+    Se hace UNA vez por carga, así las fichas no tienen que parsear nada.
+    """
+    por_candidato = {}
+    for archivo, link, nombre in filas_entrevistas:
+        por_candidato.setdefault(str(archivo), []).append((link, nombre))
+    df['Entrevistas'] = [
+        parsear_celda_entrevistas(celda) + tuple(por_candidato.get(str(archivo), ()))
+        for archivo, celda in zip(df['Archivo'], df['Entrevistas'])
+    ]
+    return df
+
+# ========== CONEXIÓN A GOOGLE DRIVE ==========
+
+class ClientesDrive:
+    """
+    Clientes de Drive reutilizables, uno por hilo (httplib2 no es thread-safe).
+    Cada uno mantiene su conexión abierta (keep-alive) y se construye con el documento
+    de descubrimiento que trae la librería, leído una sola vez. Si cambian las
+    credenciales, cada hilo rehace su cliente la próxima vez que lo pide.
+    """
+    def __init__(self):
+        from googleapiclient.discovery_cache import get_static_doc
+        self._local = threading.local()
+        self._documento = json.loads(get_static_doc('drive', 'v3'))
+        self.generacion = 0
+
+    def servicio(self, creds):
+        local = self._local
+        if getattr(local, 'creds', None) is not creds or local.generacion != self.generacion:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            from googleapiclient.discovery import build_from_document
+            http = AuthorizedHttp(creds, http=httplib2.Http(timeout=60))
+            local.servicio = build_from_document(self._documento, http=http)
+            local.creds = creds
+            local.generacion = self.generacion
+        return local.servicio
+
+    def invalidar(self):
+        """Obliga a todos los hilos a rehacer su cliente (p.ej. tras rotar credenciales)."""
+        self.generacion += 1
+
+@st.cache_resource
+def get_clientes_drive():
+    """Clientes de Drive compartidos por todas las sesiones e hilos."""
+    return ClientesDrive()
+
+# --- ÍNDICE EN MEMORIA (Archivo → fila, cabecera → columna) ---
+class IndiceHoja:
+    """
+    Guarda en memoria en qué fila está cada candidato (por 'Archivo') y en qué
+    columna está cada cabecera. Se reconstruye en cada carga de datos, así mover
+    un candidato es UNA sola escritura (sin 'find' ni 'row_values').
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.filas = {}     # "Archivo" -> nº de fila en el GSheet
+        self.columnas = {}  # "Cabecera" -> nº de columna en el GSheet
+
+    def reconstruir(self, headers, archivos):
+        """Rehace el índice a partir de la cabecera y la columna 'Archivo'."""
+        columnas = {h: i + 1 for i, h in enumerate(headers) if h}  # +1 porque gspread empieza en 1
+        filas = {}
+        for i, archivo in enumerate(archivos):
+            # +2: la fila 1 es la cabecera. Si hay duplicados, gana el primero (como 'find')
+            filas.setdefault(str(archivo), i + 2)
+        with self._lock:
+            self.columnas = columnas
+            self.filas = filas
+
+    def sincronizar(self, worksheet):
+        """Relee solo la cabecera y la columna 'Archivo' (p.ej. si hay filas nuevas)."""
+        limitador = get_limitador()
+        headers = limitador.llamar("sheets", worksheet.row_values, 1, clave=f"cabecera:{worksheet.id}")
+        if "Archivo" not in headers:
+            self.reconstruir(headers, [])
+            return
+        columna = headers.index("Archivo") + 1
+        archivos = limitador.llamar("sheets", worksheet.col_values, columna, clave=f"columna:{worksheet.id}:{columna}")[1:]
+        self.reconstruir(headers, archivos)
+
+    def fila(self, archivo, worksheet=None):
+        """Fila del candidato. Si no está y nos pasan el worksheet, se resincroniza una vez."""
+        fila = self.filas.get(str(archivo))
+        if fila is None and worksheet is not None:
+            self.sincronizar(worksheet)
+            fila = self.filas.get(str(archivo))
+        return fila
+
+    def columna(self, header):
+        return self.columnas.get(header)
+
+# --- CACHÉ COMPARTIDA CON ESCRITURA DIRECTA (WRITE-THROUGH) ---
+class CacheHoja:
+    """
+    DataFrame de la hoja compartido por TODAS las sesiones.
+    Después de cada escritura se parchea solo la celda cambiada, en vez de
+    borrar toda la caché y volver a descargar la hoja entera.
+    """
+    def __init__(self, nombre=None):
+        self._lock = threading.Lock()
+        self.lock_carga = threading.Lock()  # Solo una sesión descarga la hoja a la vez
+        self.nombre = nombre  # None = la hoja principal; si no, la pestaña de un proceso
+        self.worksheet = None  # Worksheet de la pestaña (solo para las de proceso)
+        self.df = None
+        self.indice = IndiceHoja()
+        self.cargado_en = 0.0
+        self.version = 0  # Sube en cada carga y en cada parche
+        self.version_texto = 0  # Igual, pero sin los cambios de fase (para el buscador)
+        self.revision = None         # 'modifiedTime' de la hoja cuando se cargó
+        self.revision_remota = None  # Última 'modifiedTime' consultada
+        self.sondeado_en = 0.0
+        self.hoja_entrevistas = None  # Worksheet de su pestaña de entrevistas
+        self.datos_de = None          # Cuándo se descargaron los datos que hay en memoria
+        self.copia_local = False      # True si lo que hay en memoria viene de la copia en disco
+        self.refrescando = False      # Hay una descarga en segundo plano en marcha
+        self.error_carga = None       # Último error al descargar (se siguen sirviendo los datos viejos)
+
+    def titulo_entrevistas(self):
+        if self.nombre is None:
+            return Config.HOJA_ENTREVISTAS
+        return f"{self.nombre}{SUFIJO_ENTREVISTAS}"
+
+    def ruta_copia(self):
+        """Archivo de la copia local de esta hoja (None si no se guardan copias)."""
+        if not Config.COPIA_LOCAL_PATH or self.nombre is None:
+            return Config.COPIA_LOCAL_PATH
+        raiz, extension = os.path.splitext(Config.COPIA_LOCAL_PATH)
+        return f"{raiz}.{hashlib.sha1(self.nombre.encode('utf-8')).hexdigest()[:10]}{extension}"
+
+    def vigente(self, worksheet):
+        """
+        ¿Siguen valiendo los datos en memoria? Como mucho cada
+        'INTERVALO_SONDEO_SEGUNDOS' hace una consulta mínima de la revisión.
+        """
+        if self.df is None:
+            self.revision_remota = None
+            return False
+        ahora = time.time()
+        if ahora - self.sondeado_en < Config.INTERVALO_SONDEO_SEGUNDOS:
+            return True
+        self.revision_remota = leer_revision_hoja(worksheet)
+        self.sondeado_en = ahora
+        if self.revision_remota is None:
+            # Sin revisión disponible: volvemos a la caducidad por tiempo
+            return ahora - self.cargado_en < Config.CACHE_TTL_SEGUNDOS
+        return self.revision_remota == self.revision
+
+    def guardar(self, df, revision, datos_de=None, copia_local=False):
+        with self._lock:
+            self.df = df
+            self.revision = revision
+            self.cargado_en = self.sondeado_en = time.time()
+            self.datos_de = datos_de or datetime.now()
+            self.copia_local = copia_local
+            self.error_carga = None
+            self.version += 1
+            self.version_texto += 1
+
+    def _marcar_obsoleta(self):
+        """Se siguen sirviendo los datos en memoria, pero la próxima lectura vuelve a descargar la hoja."""
+        self.revision = self.revision_remota = None
+        self.cargado_en = self.sondeado_en = 0.0
+
+    def copia(self):
+        """Copia del DataFrame en memoria (p.ej. para escribirla a disco sin bloquear a nadie)."""
+        with self._lock:
+            return None if self.df is None else self.df.copy()
+
+    def parchear(self, candidato_archivo, columna, valor):
+        """Escribe 'valor' en la fila del candidato dentro del DataFrame en memoria."""
+        with self._lock:
+            if self.df is None or columna not in self.df.columns:
+                return
+            # El índice del DataFrame es el nº de fila del GSheet
+            fila = self.indice.fila(candidato_archivo)
+            if fila is None or fila not in self.df.index or self.df.at[fila, 'Archivo'] != str(candidato_archivo):
+                # El índice y el DataFrame no coinciden: mejor recargar en la próxima lectura
+                self._marcar_obsoleta()
+                return
+            asignar_valor(self.df, fila, columna, valor)
+            self.version += 1
+            if columna != "Estado_Pipeline":
+                self.version_texto += 1
+
+    def adoptar_revision(self, antes, despues):
+        """La hoja solo cambió por una escritura nuestra (ya parcheada en memoria): sigue al día."""
+        with self._lock:
+            if self.df is not None and self.revision == antes:
+                self.revision = self.revision_remota = despues
+                self.sondeado_en = time.time()
+
+    def estados(self, archivos):
+        """Fase en memoria de esos candidatos {Archivo: fase} (los que no están no salen)."""
+        with self._lock:
+            if self.df is None:
+                return {}
+            return estados_por_indice(self.df, self.indice, archivos)
+
+    def entrevistas_de(self, candidato_archivo):
+        """Entrevistas ya cargadas del candidato (tupla vacía si no hay datos en memoria)."""
+        with self._lock:
+            fila = self.indice.fila(candidato_archivo)
+            if (self.df is None or fila is None or fila not in self.df.index
+                    or self.df.at[fila, 'Archivo'] != str(candidato_archivo)):
+                return ()
+            return self.df.at[fila, 'Entrevistas']
+
+def estados_por_indice(df, indice, archivos):
+    """'Estado_Pipeline' de cada archivo buscando su fila con el índice (comprobando que es la suya)."""
+    encontrados = {}
+    for archivo in archivos:
+        fila = indice.fila(archivo)
+        if fila is not None and fila in df.index and df.at[fila, 'Archivo'] == str(archivo):
+            encontrados[archivo] = df.at[fila, 'Estado_Pipeline']
+    return encontrados
+
+def leer_revision_hoja(worksheet):
+    """Consulta barata de la 'modifiedTime' de la hoja en Drive (None si falla)."""
+    try:
+        return get_limitador().llamar("drive", worksheet.spreadsheet.get_lastUpdateTime, clave="revision")
+    except Exception:
+        return None
+
+@contextmanager
+def escritura_propia(worksheet, cache=None):
+    """
+    Envuelve una escritura del portal en el Google Sheet (y el parche de la caché).
+    Si la hoja cambió desde que se cargó 'cache', alguien pudo borrar, insertar u
+    ordenar filas: se relee el índice de filas ANTES de escribir (si no, la escritura
+    caería en la fila de otro candidato).
+    La escritura cambia la 'modifiedTime' del libro: si justo antes las cachés estaban
+    al día, después adoptan la revisión nueva y no se vuelve a bajar la hoja entera
+    por un cambio propio. Si falla o alguien más escribió antes, no se adopta nada.
+    """
+    revision_antes = leer_revision_hoja(worksheet)
+    if cache is not None and (revision_antes is None or revision_antes != cache.revision):
+        cache.indice.sincronizar(worksheet)
+    yield
+    if revision_antes is None:
+        return
+    revision = leer_revision_hoja(worksheet)
+    if revision is None or revision == revision_antes:
+        return
+    for cache in get_caches_hojas():
+        cache.adoptar_revision(revision_antes, revision)
+    get_manifiesto().adoptar_revision(revision_antes, revision)
+    get_tabla_busqueda().adoptar_revision(revision_antes, revision)
+
+@st.cache_resource
+def get_caches_hojas():
+    """Todas las cachés de hojas creadas en el servidor (para invalidarlas juntas)."""
+    return []
+
+@st.cache_resource
+def get_cache_hoja(nombre=None):
+    """Caché (DataFrame + índice) de una hoja, compartida por todas las sesiones."""
+    cache = CacheHoja(nombre)
+    get_caches_hojas().append(cache)
+    return cache
+
+def get_hoja_entrevistas(worksheet, cache=None):
+    """Pestaña de entrevistas de la hoja (se crea con su cabecera si no existe)."""
+    from gspread.exceptions import WorksheetNotFound
+    cache = cache or get_cache_hoja()
+    if cache.hoja_entrevistas is None:
+        sh = worksheet.spreadsheet
+        limitador = get_limitador()
+        titulo = cache.titulo_entrevistas()
+        try:
+            cache.hoja_entrevistas = limitador.llamar("sheets", sh.worksheet, titulo)
+        except WorksheetNotFound:
+            hoja = limitador.llamar(
+                "sheets", sh.add_worksheet,
+                title=titulo, rows=1, cols=len(COLUMNAS_ENTREVISTAS), idempotente=False
+            )
+            # (Escribir A1 en vez de añadir una fila: se puede reintentar sin duplicar la cabecera)
+            limitador.llamar("sheets", hoja.update, values=[COLUMNAS_ENTREVISTAS], range_name="A1")
+            cache.hoja_entrevistas = hoja
+    return cache.hoja_entrevistas
+
+def descargar_hoja(worksheet, cache):
+    """
+    Descarga la hoja completa (+ entrevistas) y rehace el índice.
+    Devuelve (DataFrame normalizado, cabecera, revisión). No usa 'st.*': puede ir en un hilo.
+    """
+    # La revisión se lee ANTES de descargar: si alguien escribe durante
+    # la descarga, el siguiente sondeo verá el cambio y volverá a cargar.
+    revision = cache.revision_remota or leer_revision_hoja(worksheet)
+    
+    # Una sola llamada: cabecera + filas (así también construimos el índice)
+    limitador = get_limitador()
+    valores = limitador.llamar("sheets", worksheet.get_all_values, clave=f"hoja:{worksheet.id}")
+    headers = valores[0] if valores else []
+    filas = valores[1:]
+    
+    idx_archivo = headers.index("Archivo") if "Archivo" in headers else None
+    cache.indice.reconstruir(
+        headers,
+        [fila[idx_archivo] for fila in filas] if idx_archivo is not None else []
+    )
+    
+    # El índice de cada fila es su nº de fila en el GSheet (la 1 es la cabecera)
+    df = pd.DataFrame(filas, columns=headers, index=range(2, len(filas) + 2))
+    
+    if df.empty:
+        df = pd.DataFrame(columns=COLUMN_HEADERS)
+    
+    for col in COLUMN_HEADERS:
+        if col not in df.columns:
+            df[col] = pd.NA
+    
+    # Informes de entrevista: una fila por informe en su propia pestaña
+    hoja_entrevistas = get_hoja_entrevistas(worksheet, cache)
+    filas_entrevistas = [
+        fila[:3]
+        for fila in limitador.llamar(
+            "sheets", hoja_entrevistas.get_all_values, clave=f"hoja:{hoja_entrevistas.id}"
+        )[1:]
+        if len(fila) >= 3
+    ]
+    df = agrupar_entrevistas(df[COLUMN_HEADERS].copy(), filas_entrevistas)
+    return normalizar_tipos(df), headers, revision
+
+# --- COPIA LOCAL DE LA HOJA (arranque en caliente y respaldo si Google falla) ---
+def guardar_copia_local(cache, headers):
+    """Escribe en disco la última hoja buena. Se llama desde un hilo aparte."""
+    ruta = cache.ruta_copia()
+    if not ruta:
+        return
+    try:
+        copia = cache.copia()
+        if copia is None:
+            return
+        # Parquet no guarda tuplas de tuplas: las entrevistas van como JSON
+        copia['Entrevistas'] = [json.dumps(entrevistas) for entrevistas in copia['Entrevistas']]
+        copia.attrs['cabecera'] = headers
+        temporal = f"{ruta}.tmp"
+        copia.to_parquet(temporal)
+        os.replace(temporal, ruta)  # Nunca dejar una copia a medias
+    except Exception as e:
+        logger.warning("No se pudo guardar la copia local de la hoja: %s", e)
+
+def cargar_copia_local(cache):
+    """Pone en la caché la copia en disco (si la hay). Devuelve True si se cargó."""
+    ruta = cache.ruta_copia()
+    if not ruta or not os.path.exists(ruta):
+        return False
+    try:
+        df = pd.read_parquet(ruta)
+        headers = df.attrs.pop('cabecera', list(COLUMN_HEADERS))
+        df['Entrevistas'] = [
+            tuple(tuple(entrevista) for entrevista in json.loads(texto)) for texto in df['Entrevistas']
+        ]
+        # El índice del DataFrame son los nº de fila del GSheet: con eso se rehace el índice
+        archivos = [""] * (max(df.index, default=1) - 1)
+        for fila, archivo in zip(df.index, df['Archivo']):
+            archivos[fila - 2] = archivo
+        cache.indice.reconstruir(headers, archivos)
+        fecha = datetime.fromtimestamp(os.path.getmtime(ruta))
+        cache.guardar(df, None, datos_de=fecha, copia_local=True)
+        logger.info("Copia local cargada: %d filas del %s", len(df), fecha)
+        return True
+    except Exception as e:
+        logger.warning("No se pudo leer la copia local de la hoja: %s", e)
+        return False
+
+def refrescar_en_segundo_plano(cache, worksheet):
+    """Descarga la hoja en un hilo mientras las sesiones ven la copia local."""
+    def refrescar():
+        try:
+            with cache.lock_carga:
+                df, headers, revision = descargar_hoja(worksheet, cache)
+                cache.guardar(df, revision)
+            guardar_copia_local(cache, headers)
+        except Exception as e:
+            cache.error_carga = str(e)
+            cache.sondeado_en = time.time()
+            logger.warning("Error refrescando la hoja en segundo plano: %s", e)
+        finally:
+            cache.refrescando = False
+    
+    cache.refrescando = True
+    threading.Thread(target=refrescar, name="refresco_hoja", daemon=True).start()
+
+def load_data_from_gsheet(_worksheet, cache=None):
+    """Devuelve TODOS los datos de Google Sheets como DataFrame (solo descarga si la hoja cambió)."""
+    cache = cache or get_cache_hoja()
+    inicio = time.time()
+    
+    # Arranque en frío: la copia en disco se sirve YA y la hoja se descarga detrás
+    if cache.df is None:
+        with cache.lock_carga:
+            if cache.df is None and cargar_copia_local(cache):
+                refrescar_en_segundo_plano(cache, _worksheet)
+    
+    if cache.df is not None and (cache.refrescando or cache.vigente(_worksheet)):
+        return cache.df
+    
+    with cache.lock_carga:
+        # Otra sesión pudo cargar los datos mientras esperábamos
+        if cache.df is not None and cache.cargado_en >= inicio:
+            return cache.df
+        try:
+            df, headers, revision = descargar_hoja(_worksheet, cache)
+            cache.guardar(df, revision)
+            threading.Thread(
+                target=guardar_copia_local, args=(cache, headers), name="copia_hoja", daemon=True
+            ).start()
+            return cache.df
+            
+        except Exception as e:
+            # Mejor datos algo viejos (con aviso) que un tablero vacío
+            if cache.df is not None or cargar_copia_local(cache):
+                cache.error_carga = str(e)
+                cache.sondeado_en = time.time()  # No reintentar en cada recarga
+                logger.warning("Error leyendo Google Sheets, se sirven datos anteriores: %s", e)
+                return cache.df
+            st.error(f"Error leyendo el DataFrame de Google Sheets: {e}")
+            return pd.DataFrame(columns=COLUMN_HEADERS)
+
+# ========== ALMACENAMIENTO (GOOGLE SHEETS O SQLITE) ==========
+
+class AlmacenTalento(ABC):
+    """
+    Interfaz común para leer y escribir candidatos.
+    La app solo habla con esto; 'Config.ALMACEN' decide qué implementación se usa.
+    """
+    @abstractmethod
+    def cargar_todo(self):
+        """DataFrame con TODOS los candidatos (columnas = COLUMN_HEADERS)."""
+
+    @abstractmethod
+    def cargar_proceso(self, proceso):
+        """DataFrame solo con los candidatos de un proceso."""
+
+    @abstractmethod
+    def listar_procesos(self):
+        """Lista ordenada de procesos (para el selector del sidebar)."""
+
+    @abstractmethod
+    def version(self):
+        """Valor que cambia cada vez que cambian los datos (para cachear lo calculado)."""
+
+    def cargar_busqueda(self):
+        """Lo que indexa el buscador: por defecto todos los candidatos ('cargar_todo')."""
+        return self.cargar_todo()
+
+    def version_busqueda(self):
+        """
+        Valor que cambia cuando cambia el TEXTO que indexa el buscador (para cachear su
+        índice). Los cambios de fase no cuentan: la fase se pide aparte con 'estados'.
+        """
+        return self.version()
+
+    @abstractmethod
+    def estados(self, archivos):
+        """Fase actual de esos candidatos {Archivo: fase} (los que no existen no salen)."""
+
+    def aviso_datos(self):
+        """Texto si los datos que se muestran pueden estar desactualizados (None si están al día)."""
+        return None
+
+    @abstractmethod
+    def actualizar_estado(self, candidato_archivo, nuevo_estado):
+        """Cambia 'Estado_Pipeline'. Devuelve False si no existe el candidato."""
+
+    def actualizar_estados(self, cambios):
+        """
+        Aplica varios cambios {Archivo: nuevo estado} de golpe.
+        Devuelve la lista de candidatos que no se encontraron.
+        """
+        return [archivo for archivo, estado in cambios.items()
+                if not self.actualizar_estado(archivo, estado)]
+
+    def agregar_entrevista(self, candidato_archivo, link, nombre_archivo):
+        """Añade un informe de entrevista. Devuelve False si no existe el candidato."""
+        return self.agregar_entrevistas(candidato_archivo, [(link, nombre_archivo)])
+
+    @abstractmethod
+    def agregar_entrevistas(self, candidato_archivo, entrevistas):
+        """Añade varios informes [(link, nombre)] con UNA sola escritura (filas nuevas, sin leer nada)."""
+
+
+class AlmacenGSheet(AlmacenTalento):
+    """Google Sheets vía gspread (con la caché compartida 'CacheHoja')."""
+    def __init__(self, worksheet, cache=None):
+        self.worksheet = worksheet
+        self.cache = cache or get_cache_hoja()
+
+    def cargar_todo(self):
+        return load_data_from_gsheet(self.worksheet, self.cache)
+
+    def cargar_proceso(self, proceso):
+        df = self.cargar_todo()
+        return df[df['Proceso'] == proceso]
+
+    def listar_procesos(self):
+        df = self.cargar_todo()
+        return get_procesos_hoja(self.version(), _df=df)
+
+    def version(self):
+        return self.cache.version
+
+    def version_busqueda(self):
+        return self.cache.version_texto
+
+    def estados(self, archivos):
+        return self.cache.estados(archivos)
+
+    def aviso_datos(self):
+        cache = self.cache
+        if not cache.copia_local and cache.error_carga is None:
+            return None
+        fecha = cache.datos_de.strftime("%d/%m/%Y %H:%M") if cache.datos_de else "?"
+        if cache.refrescando:
+            return f"Mostrando la copia guardada del {fecha} mientras se descargan los datos de Google..."
+        return f"No se pudo actualizar desde Google ({cache.error_carga}). Mostrando los datos del {fecha}."
+
+    def actualizar_estado(self, candidato_archivo, nuevo_estado):
+        indice = self.cache.indice
+        
+        with escritura_propia(self.worksheet, self.cache):
+            # 1. Encontrar la fila del candidato por su nombre de archivo
+            fila = indice.fila(candidato_archivo, self.worksheet)
+            if fila is None:
+                return False
+            
+            # 2. Encontrar la columna "Estado_Pipeline"
+            col_index = indice.columna("Estado_Pipeline")
+            if col_index is None:
+                raise ValueError("No se encontró la columna 'Estado_Pipeline' en el Google Sheet.")
+            
+            # 3. Actualizar la celda
+            get_limitador().llamar("sheets", self.worksheet.update_cell, fila, col_index, nuevo_estado)
+            
+            # 4. Parchear solo esa celda en la caché compartida (sin recargar la hoja)
+            self.cache.parchear(candidato_archivo, "Estado_Pipeline", nuevo_estado)
+        return True
+
+    def actualizar_estados(self, cambios):
+        from gspread.utils import rowcol_to_a1
+        indice = self.cache.indice
+        
+        with escritura_propia(self.worksheet, self.cache):
+            col_index = indice.columna("Estado_Pipeline")
+            if col_index is None:
+                raise ValueError("No se encontró la columna 'Estado_Pipeline' en el Google Sheet.")
+            
+            no_encontrados = []
+            datos = []
+            for archivo, estado in cambios.items():
+                fila = indice.fila(archivo, self.worksheet)
+                if fila is None:
+                    no_encontrados.append(archivo)
+                    continue
+                datos.append({'range': rowcol_to_a1(fila, col_index), 'values': [[estado]]})
+            
+            if datos:
+                # Todas las celdas en UNA sola llamada a la API
+                get_limitador().llamar("sheets", self.worksheet.batch_update, datos)
+                for archivo, estado in cambios.items():
+                    if archivo not in no_encontrados:
+                        self.cache.parchear(archivo, "Estado_Pipeline", estado)
+        return no_encontrados
+
+    def agregar_entrevistas(self, candidato_archivo, entrevistas):
+        with escritura_propia(self.worksheet, self.cache):
+            fila = self.cache.indice.fila(candidato_archivo, self.worksheet)
+            if fila is None:
+                return False
+            
+            # Un informe reutilizado (mismo link) no se apunta dos veces
+            actuales = self.cache.entrevistas_de(candidato_archivo)
+            nuevas = entrevistas_nuevas(entrevistas, {link for link, _ in actuales})
+            if not nuevas:
+                return True
+            
+            # Una fila por informe, añadidas al final con UNA sola llamada
+            fecha = datetime.now().isoformat(timespec="seconds")
+            get_limitador().llamar(
+                "sheets", get_hoja_entrevistas(self.worksheet, self.cache).append_rows,
+                [[str(candidato_archivo), link, nombre, fecha] for link, nombre in nuevas],
+                idempotente=False
+            )
+            self.cache.parchear(candidato_archivo, "Entrevistas", actuales + nuevas)
+        return True
+
+
+# --- HOJAS POR PROCESO (SE DESCARGA SOLO EL PROCESO SELECCIONADO) ---
+class Manifiesto:
+    """
+    Pestaña 'Config.HOJA_MANIFIESTO': qué pestaña tiene cada proceso.
+    Es pequeña; se vuelve a leer solo si la revisión del Google Sheet cambió.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hoja = None
+        self.hojas = {}  # Proceso -> título de su pestaña
+        self.revision = None
+        self.sondeado_en = 0.0
+        self.version = 0
+        self.error = None  # Último fallo al releerlo (se sigue sirviendo el anterior)
+
+    def hojas_por_proceso(self, worksheet):
+        """
+        Proceso -> título de su pestaña. Si falla la relectura se sirve el último
+        manifiesto leído (y queda en 'self.error'); si nunca se pudo leer, se lanza el error.
+        """
+        with self._lock:
+            ahora = time.time()
+            if self.version and ahora - self.sondeado_en < Config.INTERVALO_SONDEO_SEGUNDOS:
+                return self.hojas
+            revision = leer_revision_hoja(worksheet)
+            self.sondeado_en = ahora
+            if self.version and revision is not None and revision == self.revision:
+                return self.hojas
+            try:
+                self._leer(worksheet, revision)
+            except Exception as e:
+                if not self.version:
+                    raise
+                self.error = str(e)
+                logger.warning("Error releyendo el manifiesto, se sirve el anterior: %s", e)
+            return self.hojas
+
+    def _leer(self, worksheet, revision):
+        limitador = get_limitador()
+        if self.hoja is None:
+            self.hoja = limitador.llamar("sheets", worksheet.spreadsheet.worksheet, Config.HOJA_MANIFIESTO)
+        valores = limitador.llamar("sheets", self.hoja.get_all_values, clave=f"hoja:{self.hoja.id}")
+        cabecera = valores[0] if valores else []
+        if "Proceso" not in cabecera or "Hoja" not in cabecera:
+            raise ValueError(f"La pestaña '{Config.HOJA_MANIFIESTO}' no tiene las columnas 'Proceso' y 'Hoja'.")
+        i_proceso, i_hoja = cabecera.index("Proceso"), cabecera.index("Hoja")
+        self.hojas = {
+            fila[i_proceso]: fila[i_hoja] for fila in valores[1:] if len(fila) > i_hoja and fila[i_hoja]
+        }
+        self.revision = revision
+        self.error = None
+        self.version += 1
+
+    def adoptar_revision(self, antes, despues):
+        with self._lock:
+            if self.version and self.revision == antes:
+                self.revision = despues
+
+@st.cache_resource
+def get_manifiesto():
+    return Manifiesto()
+
+class TablaBusqueda:
+    """
+    Pestaña 'Config.HOJA_BUSQUEDA': nombre, proceso, clasificación y fase de los candidatos
+    de TODOS los procesos (la escribe el script de migración). El buscador trabaja sobre
+    ella sin bajar ninguna pestaña de proceso. Es pequeña: se relee entera solo si la
+    revisión del Google Sheet cambió. Los cambios de fase del portal se apuntan también aquí.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hoja = None
+        self.df = None
+        self.indice = IndiceHoja()
+        self.revision = None
+        self.sondeado_en = 0.0
+        self.version = 0
+        self.error = None  # Último fallo al releerla (se sigue sirviendo la anterior)
+
+    def cargar(self, worksheet):
+        """
+        DataFrame con 'COLUMNAS_BUSQUEDA'. Si falla la relectura se sirve la última
+        leída (y queda en 'self.error'); si nunca se pudo leer, se lanza el error.
+        """
+        with self._lock:
+            ahora = time.time()
+            if self.df is not None and ahora - self.sondeado_en < Config.INTERVALO_SONDEO_SEGUNDOS:
+                return self.df
+            revision = leer_revision_hoja(worksheet)
+            self.sondeado_en = ahora
+            if self.df is not None and revision is not None and revision == self.revision:
+                return self.df
+            try:
+                self._leer(worksheet, revision)
+            except Exception as e:
+                if self.df is None:
+                    raise
+                self.error = str(e)
+                logger.warning("Error releyendo la pestaña del buscador, se sirve la anterior: %s", e)
+            return self.df
+
+    def _leer(self, worksheet, revision):
+        limitador = get_limitador()
+        if self.hoja is None:
+            self.hoja = limitador.llamar("sheets", worksheet.spreadsheet.worksheet, Config.HOJA_BUSQUEDA)
+        valores = limitador.llamar("sheets", self.hoja.get_all_values, clave=f"hoja:{self.hoja.id}")
+        cabecera = valores[0] if valores else []
+        if "Archivo" not in cabecera:
+            raise ValueError(f"La pestaña '{Config.HOJA_BUSQUEDA}' no tiene la columna 'Archivo'.")
+        filas = valores[1:]
+        i_archivo = cabecera.index("Archivo")
+        self.indice.reconstruir(cabecera, [fila[i_archivo] for fila in filas])
+        # Igual que en las hojas: el índice de cada fila es su nº de fila en el GSheet
+        df = pd.DataFrame(filas, columns=cabecera, index=range(2, len(filas) + 2))
+        for col in COLUMNAS_BUSQUEDA:
+            if col not in df.columns:
+                df[col] = ""
+        self.df = df[COLUMNAS_BUSQUEDA].copy()
+        self.revision = revision
+        self.error = None
+        self.version += 1
+
+    def actualizar_estados(self, cambios):
+        """
+        Apunta las nuevas fases {Archivo: estado} con UNA escritura. Si falla, no se
+        propaga (las pestañas de proceso ya están guardadas): se relee en la próxima búsqueda.
+        """
+        from gspread.utils import rowcol_to_a1
+        if self.hoja is None or self.df is None:
+            return  # Nadie ha buscado aún: se leerá ya con las fases nuevas
+        try:
+            with escritura_propia(self.hoja, self):
+                col_index = self.indice.columna("Estado_Pipeline")
+                filas = {archivo: self.indice.fila(archivo) for archivo in cambios}
+                datos = [
+                    {'range': rowcol_to_a1(fila, col_index), 'values': [[cambios[archivo]]]}
+                    for archivo, fila in filas.items() if fila is not None
+                ]
+                if col_index is None or not datos:
+                    return
+                get_limitador().llamar("sheets", self.hoja.batch_update, datos)
+                with self._lock:
+                    for archivo, fila in filas.items():
+                        if fila is None:
+                            continue
+                        if fila not in self.df.index or self.df.at[fila, 'Archivo'] != str(archivo):
+                            # No cuadra: mejor releerla entera en la próxima búsqueda
+                            self.revision = None
+                            self.sondeado_en = 0.0
+                            break
+                        self.df.at[fila, 'Estado_Pipeline'] = cambios[archivo]
+        except Exception as e:
+            logger.warning("No se pudo apuntar el cambio de fase en la pestaña del buscador: %s", e)
+            with self._lock:
+                self.revision = None
+                self.sondeado_en = 0.0
+
+    def estados(self, archivos):
+        with self._lock:
+            if self.df is None:
+                return {}
+            return estados_por_indice(self.df, self.indice, archivos)
+
+    def adoptar_revision(self, antes, despues):
+        with self._lock:
+            if self.df is not None and self.revision == antes:
+                self.revision = despues
+
+@st.cache_resource
+def get_tabla_busqueda():
+    return TablaBusqueda()
+
+class AlmacenGSheetPorProceso(AlmacenTalento):
+    """
+    Google Sheets con una pestaña por proceso (ver 'Config.HOJA_MANIFIESTO').
+    Cada pestaña es una 'AlmacenGSheet' con su propia caché: solo se descarga
+    la del proceso que se abre, así la carga crece con ese proceso y no con todo el histórico.
+    """
+    def __init__(self, worksheet):
+        self.worksheet = worksheet  # Cualquier pestaña del libro (solo se usa para llegar al resto)
+        self.manifiesto = get_manifiesto()
+        self.tabla_busqueda = get_tabla_busqueda()
+
+    def _hojas_por_proceso(self):
+        """Manifiesto (proceso -> pestaña). Si no se puede leer, lo dice en pantalla y devuelve {}."""
+        try:
+            return self.manifiesto.hojas_por_proceso(self.worksheet)
+        except Exception as e:
+            if type(e).__name__ == "WorksheetNotFound":
+                st.error(f"No existe la pestaña '{Config.HOJA_MANIFIESTO}' en el Google Sheet. "
+                         "Ejecuta 'python migrar_a_hojas_por_proceso.py' para crearla.")
+            else:
+                st.error(f"Error leyendo la pestaña '{Config.HOJA_MANIFIESTO}': {e}")
+            return {}
+
+    def _hoja(self, proceso):
+        """'AlmacenGSheet' de la pestaña del proceso (None si el proceso no está en el manifiesto o no se puede abrir)."""
+        titulo = self._hojas_por_proceso().get(proceso)
+        if titulo is None:
+            return None
+        cache = get_cache_hoja(titulo)
+        if cache.worksheet is None:
+            try:
+                cache.worksheet = get_limitador().llamar("sheets", self.worksheet.spreadsheet.worksheet, titulo)
+            except Exception as e:
+                st.error(f"No se pudo abrir la pestaña '{titulo}' del proceso '{proceso}': {e}")
+                return None
+        return AlmacenGSheet(cache.worksheet, cache)
+
+    def _hojas_cargadas(self):
+        """Pestañas de proceso que ya están en memoria (las únicas donde puede estar algo que se ve)."""
+        titulos = set(self.manifiesto.hojas.values())
+        return [
+            AlmacenGSheet(cache.worksheet, cache)
+            for cache in get_caches_hojas()
+            if cache.nombre in titulos and cache.worksheet is not None
+        ]
+
+    def _hoja_de(self, candidato_archivo):
+        for hoja in self._hojas_cargadas():
+            if str(candidato_archivo) in hoja.cache.indice.filas:
+                return hoja
+        return None
+
+    def cargar_todo(self):
+        """Todas las pestañas juntas (descarga todos los procesos: el buscador usa 'TablaBusqueda')."""
+        partes = [self.cargar_proceso(proceso) for proceso in self.listar_procesos()]
+        partes = [df for df in partes if not df.empty]
+        if not partes:
+            return pd.DataFrame(columns=COLUMN_HEADERS)
+        return pd.concat(partes)
+
+    def cargar_proceso(self, proceso):
+        hoja = self._hoja(proceso)
+        if hoja is None:
+            return pd.DataFrame(columns=COLUMN_HEADERS)
+        df = hoja.cargar_todo()
+        return df[df['Proceso'] == proceso]
+
+    def listar_procesos(self):
+        return sorted(self._hojas_por_proceso())
+
+    def cargar_busqueda(self):
+        try:
+            return self.tabla_busqueda.cargar(self.worksheet)
+        except Exception as e:
+            if type(e).__name__ == "WorksheetNotFound":
+                st.error(f"No existe la pestaña '{Config.HOJA_BUSQUEDA}' en el Google Sheet. "
+                         "Ejecuta 'python migrar_a_hojas_por_proceso.py' para crearla.")
+            else:
+                st.error(f"Error leyendo la pestaña '{Config.HOJA_BUSQUEDA}': {e}")
+            return pd.DataFrame(columns=COLUMNAS_BUSQUEDA)
+
+    def version(self):
+        return (self.manifiesto.version,) + tuple(hoja.version() for hoja in self._hojas_cargadas())
+
+    def version_busqueda(self):
+        return (self.manifiesto.version, self.tabla_busqueda.version)
+
+    def estados(self, archivos):
+        # Lo de las pestañas en memoria manda; la del buscador cubre el resto
+        encontrados = {}
+        for hoja in self._hojas_cargadas():
+            encontrados.update(hoja.estados([a for a in archivos if a not in encontrados]))
+        faltan = [archivo for archivo in archivos if archivo not in encontrados]
+        if faltan:
+            encontrados.update(self.tabla_busqueda.estados(faltan))
+        return encontrados
+
+    def aviso_datos(self):
+        if self.manifiesto.error is not None:
+            return f"No se pudo actualizar la lista de procesos ({self.manifiesto.error}). Mostrando la última leída."
+        for hoja in self._hojas_cargadas():
+            aviso = hoja.aviso_datos()
+            if aviso:
+                return aviso
+        return None
+
+    def actualizar_estado(self, candidato_archivo, nuevo_estado):
+        return not self.actualizar_estados({candidato_archivo: nuevo_estado})
+
+    def actualizar_estados(self, cambios):
+        # Un 'batch_update' por pestaña afectada
+        por_hoja = {}
+        no_encontrados = []
+        for archivo, estado in cambios.items():
+            hoja = self._hoja_de(archivo)
+            if hoja is None:
+                no_encontrados.append(archivo)
+                continue
+            por_hoja.setdefault(hoja.cache.nombre, (hoja, {}))[1][archivo] = estado
+        for hoja, cambios_hoja in por_hoja.values():
+            no_encontrados.extend(hoja.actualizar_estados(cambios_hoja))
+        guardados = {archivo: estado for archivo, estado in cambios.items() if archivo not in no_encontrados}
+        if guardados:
+            self.tabla_busqueda.actualizar_estados(guardados)
+        return no_encontrados
+
+    def agregar_entrevistas(self, candidato_archivo, entrevistas):
+        hoja = self._hoja_de(candidato_archivo)
+        return hoja is not None and hoja.agregar_entrevistas(candidato_archivo, entrevistas)
+
+
+class AlmacenSQLite(AlmacenTalento):
+    """
+    Base de datos local SQLite con índices por 'Archivo' y por (Proceso, Estado_Pipeline).
+    Sirve para datasets grandes y para probar la app sin Google.
+    """
+    def __init__(self, ruta):
+        self._lock = threading.Lock()
+        self._escrituras = 0
+        self._escrituras_texto = 0  # Las que cambian lo que indexa el buscador (no las de fase)
+        # Una sola conexión compartida entre sesiones (protegida con el lock)
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        columnas = ", ".join(
+            f'"{col}" TEXT PRIMARY KEY' if col == "Archivo" else f'"{col}" TEXT'
+            for col in COLUMN_HEADERS
+        )
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS candidatos ({columnas})")
+            self.conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_proceso_estado ON candidatos ("Proceso", "Estado_Pipeline")'
+            )
+            # Una fila por informe de entrevista
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS entrevistas '
+                '(id INTEGER PRIMARY KEY, "Archivo" TEXT, "Link" TEXT, "Nombre" TEXT, "Fecha" TEXT)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entrevistas_archivo ON entrevistas ("Archivo")')
+
+    def _consultar(self, where="", params=()):
+        columnas = ", ".join(f'"{col}"' for col in COLUMN_HEADERS)
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT {columnas} FROM candidatos {where} ORDER BY rowid", self.conn, params=params
+            )
+            filas_entrevistas = self.conn.execute(
+                f'SELECT e."Archivo", e."Link", e."Nombre" FROM entrevistas e '
+                f'JOIN candidatos USING ("Archivo") {where} ORDER BY e.id',
+                params
+            ).fetchall()
+        return normalizar_tipos(agrupar_entrevistas(df, filas_entrevistas))
+
+    def cargar_todo(self):
+        return self._consultar()
+
+    def cargar_proceso(self, proceso):
+        return self._consultar('WHERE "Proceso" = ?', (proceso,))
+
+    def listar_procesos(self):
+        with self._lock:
+            filas = self.conn.execute(
+                'SELECT DISTINCT "Proceso" FROM candidatos ORDER BY "Proceso"'
+            ).fetchall()
+        return [fila[0] for fila in filas]
+
+    def version(self):
+        # 'data_version' cambia con escrituras de OTRAS conexiones; las nuestras las contamos aparte
+        with self._lock:
+            return (self.conn.execute("PRAGMA data_version").fetchone()[0], self._escrituras)
+
+    def version_busqueda(self):
+        with self._lock:
+            return (self.conn.execute("PRAGMA data_version").fetchone()[0], self._escrituras_texto)
+
+    def estados(self, archivos):
+        if not archivos:
+            return {}
+        marcadores = ", ".join("?" for _ in archivos)
+        with self._lock:
+            filas = self.conn.execute(
+                f'SELECT "Archivo", "Estado_Pipeline" FROM candidatos WHERE "Archivo" IN ({marcadores})',
+                [str(archivo) for archivo in archivos]
+            ).fetchall()
+        return dict(filas)
+
+    def actualizar_estado(self, candidato_archivo, nuevo_estado):
+        with self._lock, self.conn:
+            self._escrituras += 1
+            cursor = self.conn.execute(
+                'UPDATE candidatos SET "Estado_Pipeline" = ? WHERE "Archivo" = ?',
+                (nuevo_estado, str(candidato_archivo))
+            )
+        return cursor.rowcount > 0
+
+    def actualizar_estados(self, cambios):
+        if not cambios:
+            return []
+        archivos = [str(archivo) for archivo in cambios]
+        marcadores = ", ".join("?" for _ in archivos)
+        with self._lock, self.conn:
+            self._escrituras += 1
+            existentes = {fila[0] for fila in self.conn.execute(
+                f'SELECT "Archivo" FROM candidatos WHERE "Archivo" IN ({marcadores})', archivos
+            )}
+            self.conn.executemany(
+                'UPDATE candidatos SET "Estado_Pipeline" = ? WHERE "Archivo" = ?',
+                [(estado, str(archivo)) for archivo, estado in cambios.items() if str(archivo) in existentes]
+            )
+        return [archivo for archivo in cambios if str(archivo) not in existentes]
+
+    def agregar_entrevistas(self, candidato_archivo, entrevistas):
+        with self._lock, self.conn:
+            self._escrituras += 1
+            self._escrituras_texto += 1
+            fila = self.conn.execute(
+                """SELECT COALESCE("Entrevistas", '') FROM candidatos WHERE "Archivo" = ?""",
+                (str(candidato_archivo),)
+            ).fetchone()
+            if fila is None:
+                return False
+            # Un informe reutilizado no se apunta dos veces (ni en la tabla ni en la celda antigua)
+            links_actuales = {link for link, _ in parsear_celda_entrevistas(fila[0])}
+            links_actuales.update(link for (link,) in self.conn.execute(
+                'SELECT "Link" FROM entrevistas WHERE "Archivo" = ?', (str(candidato_archivo),)
+            ))
+            fecha = datetime.now().isoformat(timespec="seconds")
+            self.conn.executemany(
+                'INSERT INTO entrevistas ("Archivo", "Link", "Nombre", "Fecha") VALUES (?, ?, ?, ?)',
+                [(str(candidato_archivo), link, nombre, fecha)
+                 for link, nombre in entrevistas_nuevas(entrevistas, links_actuales)]
+            )
+        return True
+
+    def importar(self, df):
+        """
+        Carga un DataFrame (p.ej. el de la hoja) en la base. Si un 'Archivo' ya existe, se conserva.
+        Devuelve cuántos candidatos nuevos entraron. Desde la hoja: python importar_a_sqlite.py
+        """
+        filas = df.reindex(columns=COLUMN_HEADERS).astype(object)
+        # Las entrevistas ya parseadas (tuplas) van a su propia tabla, una fila por informe
+        entrevistas = [
+            (str(archivo), link, nombre)
+            for archivo, valor in zip(filas['Archivo'], filas['Entrevistas']) if isinstance(valor, tuple)
+            for link, nombre in valor
+        ]
+        filas['Entrevistas'] = [None if isinstance(valor, tuple) else valor for valor in filas['Entrevistas']]
+        # Un DataFrame ya normalizado trae fechas: se guardan como texto (así las lee '_consultar')
+        filas['Fecha'] = [valor.isoformat() if isinstance(valor, datetime) else valor for valor in filas['Fecha']]
+        filas = filas.where(filas.notna(), None)
+        marcadores = ", ".join("?" for _ in COLUMN_HEADERS)
+        with self._lock, self.conn:
+            self._escrituras += 1
+            self._escrituras_texto += 1
+            nuevos = {
+                archivo for (archivo,) in self.conn.execute('SELECT "Archivo" FROM candidatos')
+            }
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO candidatos VALUES ({marcadores})",
+                filas.itertuples(index=False, name=None)
+            )
+            nuevos = {
+                archivo for (archivo,) in self.conn.execute('SELECT "Archivo" FROM candidatos')
+            } - nuevos
+            self.conn.executemany(
+                'INSERT INTO entrevistas ("Archivo", "Link", "Nombre") VALUES (?, ?, ?)',
+                [e for e in entrevistas if e[0] in nuevos]
+            )
+        return len(nuevos)
+
+
+@st.cache_resource(max_entries=2)
+def get_procesos_hoja(version, _df):
+    """Procesos de la hoja, calculados una vez por versión de los datos."""
+    return sorted(_df['Proceso'].unique())
+
+@st.cache_resource
+def get_almacen_sqlite(ruta):
+    return AlmacenSQLite(ruta)
+
+def get_almacen():
+    """Devuelve el almacén configurado en 'Config.ALMACEN' (None si no hay conexión)."""
+    if Config.ALMACEN == "sqlite":
+        return get_almacen_sqlite(Config.SQLITE_PATH)
+    
+    # Volver a conectar (no se puede pasar 'worksheet' como arg a on_click)
+    creds = get_google_creds(Config.GDRIVE_TOKEN_FILE)
+    worksheet = connect_to_gsheet(creds)
+    if worksheet is None:
+        return None
+    if Config.ALMACEN == "gsheet_procesos":
+        return AlmacenGSheetPorProceso(worksheet)
+    return AlmacenGSheet(worksheet)
+
+
+# --- ÍNDICE DE GRUPOS (Proceso, Estado_Pipeline, Clasificación) ---
+class IndiceGrupos:
+    """
+    Posiciones de fila de cada grupo (Proceso, Estado_Pipeline, Clasificación).
+    Se calcula UNA vez por versión de los datos: cambiar de fase y contar
+    candidatos por fase son búsquedas en un diccionario, no filtros sobre todo el DataFrame.
+    """
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)  # Posición 0..n-1 (ya viene ordenado por fecha)
+        self.grupos = {}  # (Proceso, Estado) -> {Clasificación: array de posiciones}
+        claves = ['Proceso', 'Estado_Pipeline', 'Clasificación']
+        grupos = self.df.groupby(claves, sort=False, dropna=False, observed=True).indices
+        for (proceso, estado, clasificacion), posiciones in grupos.items():
+            self.grupos.setdefault((proceso, estado), {})[clasificacion] = posiciones
+        self.posicion = {}  # "Archivo" -> posición (gana el primero, como en la hoja)
+        for i, archivo in enumerate(self.df['Archivo']):
+            self.posicion.setdefault(archivo, i)
+
+    def _pendientes_del_proceso(self, proceso, pendientes):
+        """[(posición, estado original, nuevo estado)] de los cambios pendientes de este proceso."""
+        cambios = []
+        for archivo, nuevo_estado in (pendientes or {}).items():
+            i = self.posicion.get(archivo)
+            if i is not None and self.df['Proceso'].iat[i] == proceso:
+                cambios.append((i, self.df['Estado_Pipeline'].iat[i], nuevo_estado))
+        return cambios
+
+    def conteo(self, proceso, estado, clasificacion=None, pendientes=None):
+        """Nº de candidatos en (proceso, estado[, clasificación]) contando los cambios pendientes."""
+        grupo = self.grupos.get((proceso, estado), {})
+        if clasificacion is None:
+            total = sum(len(posiciones) for posiciones in grupo.values())
+        else:
+            total = len(grupo.get(clasificacion, ()))
+        for i, original, nuevo in self._pendientes_del_proceso(proceso, pendientes):
+            if clasificacion is not None and self.df['Clasificación'].iat[i] != clasificacion:
+                continue
+            total += (nuevo == estado) - (original == estado)
+        return total
+
+    def fase(self, proceso, estado, clasificacion=None, pendientes=None):
+        """DataFrame de (proceso, estado[, clasificación]) con los cambios pendientes ya aplicados."""
+        grupo = self.grupos.get((proceso, estado), {})
+        if clasificacion is None:
+            partes = list(grupo.values())
+        else:
+            partes = [grupo[clasificacion]] if clasificacion in grupo else []
+        posiciones = set(np.concatenate(partes).tolist()) if partes else set()
+        
+        # Ajustar con los movimientos aún no guardados (vista optimista)
+        entrantes = set()
+        for i, original, nuevo in self._pendientes_del_proceso(proceso, pendientes):
+            if clasificacion is not None and self.df['Clasificación'].iat[i] != clasificacion:
+                continue
+            if nuevo == estado and original != estado:
+                posiciones.add(i)
+                entrantes.add(i)
+            elif original == estado and nuevo != estado:
+                posiciones.discard(i)
+        
+        # Las posiciones ya siguen el orden por fecha hecho al cargar
+        df_fase = self.df.iloc[sorted(posiciones)]
+        if entrantes:
+            df_fase = df_fase.copy()
+            asignar_valor(df_fase, self.df.index[sorted(entrantes)], 'Estado_Pipeline', estado)
+        return df_fase
+
+@st.cache_resource(max_entries=16)
+def get_indice_grupos(tipo_almacen, proceso, version, _almacen):
+    """Índice de grupos de un proceso, cacheado por versión de los datos."""
+    return IndiceGrupos(_almacen.cargar_proceso(proceso))
+
+# --- BUSCADOR DE CANDIDATOS (TODOS LOS PROCESOS) ---
+# Tildes más comunes (en C, muy rápido); lo raro pasa por 'unicodedata'
+TABLA_TILDES = str.maketrans("áéíóúàèìòùäëïöüâêîôûñç", "aeiouaeiouaeiouaeiounc")
+
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes: 'José Núñez' -> 'jose nunez'."""
+    texto = str(texto).lower().translate(TABLA_TILDES)
+    if texto.isascii():  # Lo más habitual
+        return texto
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+def palabras(texto):
+    """Palabras normalizadas de un texto ('CV_José_García.pdf' -> ['cv', 'jose', 'garcia', 'pdf'])."""
+    return re.findall(r"[^\W_]+", normalizar_texto(texto))
+
+class IndiceBusqueda:
+    """
+    Índice invertido (palabra -> posiciones) sobre 'Archivo', 'Comentarios' y los nombres
+    de los informes de entrevista. Se construye UNA vez por versión del texto (mover a un
+    candidato de fase no lo rehace); buscar es localizar las palabras por prefijo en el
+    vocabulario ordenado e intersecar posiciones.
+    Solo incluye candidatos que el cliente ve en el tablero (Óptimos y Adecuados).
+    """
+    def __init__(self, df):
+        visibles = df[df['Clasificación'].isin([c['label'] for c in CATEGORIES])]
+        self.df = visibles[['Archivo', 'Proceso', 'Estado_Pipeline', 'Clasificación']].reset_index(drop=True)
+        indice = {}
+        normalizadas = {}  # Las palabras se repiten mucho: cada una se normaliza UNA vez
+        patron = re.compile(r"[^\W_]+")
+        # (La pestaña del buscador de 'gsheet_procesos' solo trae el nombre)
+        sin_texto = [()] * len(visibles)
+        columnas = zip(visibles['Archivo'], visibles.get('Comentarios', sin_texto), visibles.get('Entrevistas', sin_texto))
+        for i, (archivo, comentarios, entrevistas) in enumerate(columnas):
+            texto = f"{archivo} {comentarios if isinstance(comentarios, str) else ''} "
+            texto += " ".join(nombre for _, nombre in entrevistas)
+            for palabra in set(patron.findall(texto.lower())):
+                normalizada = normalizadas.get(palabra)
+                if normalizada is None:
+                    normalizada = normalizadas[palabra] = normalizar_texto(palabra)
+                posiciones = indice.setdefault(normalizada, [])
+                if not posiciones or posiciones[-1] != i:  # 'josé' y 'jose' en la misma fila
+                    posiciones.append(i)
+        self.vocabulario = sorted(indice)
+        self.posiciones = [indice[palabra] for palabra in self.vocabulario]
+
+    def _con_prefijo(self, prefijo):
+        """Posiciones de todas las palabras que empiezan por 'prefijo' (búsqueda binaria)."""
+        inicio = bisect.bisect_left(self.vocabulario, prefijo)
+        fin = bisect.bisect_left(self.vocabulario, prefijo + "\uffff")
+        encontradas = set()
+        for posiciones in self.posiciones[inicio:fin]:
+            encontradas.update(posiciones)
+        return encontradas
+
+    def buscar(self, consulta, limite, fases=None):
+        """
+        Candidatos con TODAS las palabras de la consulta (cada una como prefijo), los más
+        recientes primero. Devuelve (lista de dicts, nº total de coincidencias).
+        La fase del índice puede ser vieja: 'fases(archivos)' da la actual {Archivo: fase}.
+        """
+        terminos = palabras(consulta)
+        if not terminos:
+            return [], 0
+        # Primero las palabras más largas: suelen dar menos posiciones y se descarta antes
+        resultado = None
+        for termino in sorted(terminos, key=len, reverse=True):
+            posiciones = self._con_prefijo(termino)
+            resultado = posiciones if resultado is None else resultado & posiciones
+            if not resultado:
+                return [], 0
+        registros = self.df.iloc[sorted(resultado)[:limite]].to_dict('records')
+        if fases is not None:
+            actuales = fases([registro['Archivo'] for registro in registros])
+            for registro in registros:
+                registro['Estado_Pipeline'] = actuales.get(registro['Archivo'], registro['Estado_Pipeline'])
+        return registros, len(resultado)
+
+@st.cache_resource(max_entries=2)
+def get_indice_busqueda(tipo_almacen, version, _almacen):
+    """Índice del buscador, cacheado por versión del texto (compartido por todas las sesiones)."""
+    return IndiceBusqueda(_almacen.cargar_busqueda())
+
+# --- COLA DE ESCRITURAS (CAMBIOS DE FASE EN LOTE) ---
+class ColaEscrituras:
+    """
+    Cambios de fase pendientes de UNA sesión. La interfaz los muestra al momento
+    (de forma optimista) y se guardan todos juntos en una sola escritura.
+    La usan la sesión y el hilo de guardado ('GuardadoCambios') a la vez.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pendientes = {}  # "Archivo" -> nuevo estado (si se mueve dos veces, gana el último)
+        self.guardando = {}   # Los que se están escribiendo ahora mismo
+        self.desde = None     # Momento del cambio pendiente más antiguo
+        self.fallidos = []    # [(Archivo, estado, motivo)] para avisar al usuario
+        self.guardados = 0    # Cuántos se guardaron desde el último aviso
+        self.almacen = None   # Almacén donde guardar (el de la sesión al encolar)
+        self.metricas = None  # Métricas de la sesión (las llamadas a la API cuentan para ella)
+
+    def encolar(self, candidato_archivo, nuevo_estado):
+        with self._lock:
+            if not self.pendientes:
+                self.desde = time.time()
+            self.pendientes[candidato_archivo] = nuevo_estado
+
+    def toca_aplicar(self):
+        with self._lock:
+            return bool(self.pendientes) and (time.time() - self.desde) >= Config.SEGUNDOS_LOTE_ESCRITURA
+
+    def visibles(self):
+        """Estados que la interfaz debe mostrar ya: los pendientes y los que se están guardando."""
+        with self._lock:
+            return {**self.guardando, **self.pendientes}
+
+    def aplicar(self, almacen=None):
+        """Guarda todos los pendientes. Devuelve cuántos se guardaron bien."""
+        almacen = almacen or self.almacen
+        with self._lock:
+            if not self.pendientes:
+                return 0
+            cambios, self.pendientes, self.desde = self.pendientes, {}, None
+            self.guardando.update(cambios)
+        try:
+            if almacen is None:
+                raise ConnectionError("Error de conexión con la base de datos")
+            no_encontrados = almacen.actualizar_estados(cambios)
+        except Exception as e:
+            logger.warning("No se pudieron guardar %d cambio(s) de fase: %s", len(cambios), e)
+            no_encontrados, motivo = list(cambios), str(e)
+        else:
+            motivo = "No se encontró en la base de datos"
+        with self._lock:
+            for archivo, estado in cambios.items():
+                if self.guardando.get(archivo) == estado:
+                    del self.guardando[archivo]
+            self.fallidos += [(archivo, cambios[archivo], motivo) for archivo in no_encontrados]
+            self.guardados += len(cambios) - len(no_encontrados)
+        return len(cambios) - len(no_encontrados)
+
+def get_cola_escrituras():
+    """Cola de escrituras de la sesión actual."""
+    if 'cola_escrituras' not in st.session_state:
+        st.session_state.cola_escrituras = ColaEscrituras()
+    return st.session_state.cola_escrituras
+
+class GuardadoCambios:
+    """
+    Hilo del servidor que guarda las colas con cambios pendientes cuando les toca
+    ('Config.SEGUNDOS_LOTE_ESCRITURA'). Como no depende del navegador, un cambio
+    ya mostrado como hecho se guarda aunque el cliente cierre la pestaña.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._colas = set()
+        self._hay_colas = threading.Event()
+        threading.Thread(target=self._bucle, name="guardado_cambios", daemon=True).start()
 
-# Nombres de los archivos que la app espera encontrar
-CLIENT_SECRETS_FILE = "client_secrets.json"
-TOKEN_FILE = "token.json"
+    def vigilar(self, cola):
+        with self._lock:
+            self._colas.add(cola)
+        self._hay_colas.set()
 
-# Comprobar si estamos en Streamlit Cloud (buscando los secretos)
-if st.secrets.get("GOOGLE_CLIENT_SECRETS"):
-    
-    # Si estamos en la nube y el archivo NO existe...
-    if not os.path.exists(CLIENT_SECRETS_FILE):
-        # ...crear el archivo 'client_secrets.json' a partir del secreto
-        with open(CLIENT_SECRETS_FILE, "w") as f:
-            # Escribimos el TEXTO del secreto (que guardamos con """...""")
-            f.write(st.secrets["GOOGLE_CLIENT_SECRETS"])
-            
-    # Si estamos en la nube y el archivo NO existe...
-    if not os.path.exists(TOKEN_FILE):
-        # ...crear el archivo 'token.json' a partir del secreto
-        with open(TOKEN_FILE, "w") as f:
-            # Escribimos el TEXTO del secreto (que guardamos con """...""")
-            f.write(st.secrets["GOOGLE_TOKEN"])
+    def _bucle(self):
+        while True:
+            self._hay_colas.wait()
+            for cola in list(self._colas):
+                if cola.toca_aplicar():
+                    usar_metricas(cola.metricas)
+                    cola.aplicar()
+                with self._lock:
+                    # (Si se encola justo después, 'vigilar' la vuelve a añadir)
+                    if not cola.pendientes:
+                        self._colas.discard(cola)
+                    if not self._colas:
+                        self._hay_colas.clear()
+            time.sleep(1)
 
-# --- ★★★ FIN: BLOQUE PARA DESPLIEGUE EN STREAMLIT CLOUD ★★★ ---
+@st.cache_resource
+def get_guardado_cambios():
+    return GuardadoCambios()
 
+def encolar_cambios(cambios):
+    """Pone los cambios en la cola de la sesión y deja al hilo de guardado pendiente de ella."""
+    cola = get_cola_escrituras()
+    cola.almacen = get_almacen()
+    cola.metricas = get_metricas_sesion()
+    for candidato_archivo, nuevo_estado in cambios.items():
+        cola.encolar(candidato_archivo, nuevo_estado)
+    get_guardado_cambios().vigilar(cola)
+    return cola
 
-# Ignorar advertencias comunes
-warnings.filterwarnings('ignore', category=FutureWarning)
+def aplicar_cambios_pendientes():
+    """Guarda en el almacén todos los cambios de fase pendientes de esta sesión."""
+    cola = get_cola_escrituras()
+    if cola.pendientes:
+        get_metricas_sesion()  # Las llamadas a la API cuentan para esta sesión
+        with medir("guardar_cambios"):
+            cola.aplicar(get_almacen())
 
-# ========== CONFIGURACIÓN ==========
-class Config:
-    # 1. El JSON que descargaste de "ID de cliente de OAuth"
-    # (Ahora se crea automáticamente en la nube desde los 'secrets')
-    GDRIVE_CREDENTIALS_FILE = "client_secrets.json" 
+def reintentar_fallidos():
+    """Vuelve a poner en la cola las escrituras que fallaron y las guarda."""
+    cola = get_cola_escrituras()
+    fallidos, cola.fallidos = cola.fallidos, []
+    encolar_cambios({archivo: estado for archivo, estado, _ in fallidos})
+    aplicar_cambios_pendientes()
+
+def descartar_fallidos():
+    get_cola_escrituras().fallidos = []
+
+# --- LÓGICA DE ESCRITURA (MOVER CANDIDATO) ---
+def mover_candidato(candidato_archivo, nuevo_estado):
+    """Mueve al candidato en pantalla y deja el cambio en la cola de escrituras."""
+    encolar_cambios({candidato_archivo: nuevo_estado})
+    st.session_state.pop(f"sel_{candidato_archivo}", None)  # Que no siga marcado en su nueva fase
+    if Config.SEGUNDOS_LOTE_ESCRITURA <= 0:
+        aplicar_cambios_pendientes()
+    # La ficha (un fragmento) se redibuja sola y muestra el movimiento sin recargar la página
+    st.session_state.setdefault('fichas_movidas', {})[candidato_archivo] = nuevo_estado
+
+def mover_seleccionados(candidatos_fase, nuevo_estado):
+    """
+    Mueve a 'nuevo_estado' los candidatos marcados de la fase actual,
+    todos en UNA sola escritura en lote (no una llamada por candidato).
+    """
+    seleccionados = [a for a in candidatos_fase if st.session_state.get(f"sel_{a}")]
+    if not seleccionados:
+        st.warning("No hay candidatos seleccionados.")
+        return
     
-    # 2. El token que creaste con auth.py
-    # (Ahora se crea automáticamente en la nube desde los 'secrets')
-    GDRIVE_TOKEN_FILE = "token.json"
+    encolar_cambios({candidato_archivo: nuevo_estado for candidato_archivo in seleccionados})
+    for candidato_archivo in seleccionados:
+        st.session_state[f"sel_{candidato_archivo}"] = False  # Quitar la marca
+    aplicar_cambios_pendientes()
+    st.success(f"Movidos {len(seleccionados)} candidato(s) a '{nuevo_estado}'!")
+
+def marcar_todos(candidatos_fase, marcar):
+    for candidato_archivo in candidatos_fase:
+        st.session_state[f"sel_{candidato_archivo}"] = marcar
+
+# --- ★★★ INICIO: FUNCIÓN 'SUBIR ENTREVISTA' ARREGLADA ★★★ ---
+def subir_entrevista(candidato_archivo, archivo_subido, drive_service, tarea=None):
+    """
+    Sube un informe de entrevista a Drive por trozos y devuelve su 'webViewLink'.
+    Si ese mismo contenido ya se subió antes, reutiliza el archivo existente.
+    Se ejecuta en un hilo de fondo: NO puede usar 'st.*'. El progreso se apunta en 'tarea'.
+    """
+    # ¿Ya está en Drive? (mismo hash de contenido => mismo informe)
+    hash_contenido = calcular_hash(archivo_subido)
+    link_existente = buscar_por_hash(drive_service, hash_contenido)
+    if link_existente:
+        if tarea is not None:
+            tarea.reutilizado = True
+        return link_existente
     
-    # 3. El nombre EXACTO de tu Google Sheet
-    GSHEET_NAME = "BaseDeDatos_TalentHub" # <-- REEMPLAZA ESTO
+    # --- ARREGLO 1: Obtener el MIME type real del archivo ---
+    mime_type_real = archivo_subido.type
     
-    # 4. ID de la carpeta donde se guardarán las entrevistas (OPCIONAL)
-    ENTREVISTAS_FOLDER_ID = None  # <-- Si usas una carpeta específica, pon su ID aquí
+    # Preparar metadatos del archivo
+    file_metadata = {
+        'name': f"Entrevista_{candidato_archivo}_{archivo_subido.name}",
+        # --- ARREGLO 2: Usar el MIME type real ---
+        'mimeType': mime_type_real,
+        # El hash queda guardado en el propio archivo para detectar duplicados
+        'appProperties': {'sha256': hash_contenido}
+    }
     
-# Definimos los "permisos" (necesitamos leer y escribir)
-SCOPES = [
-    'https://www.googleapis.com/auth/spreadsheets',
-    'https://www.googleapis.com/auth/drive'
-]
+    # Si se especificó una carpeta, usarla
+    if Config.ENTREVISTAS_FOLDER_ID:
+        file_metadata['parents'] = [Config.ENTREVISTAS_FOLDER_ID]
+    
+    # Se sube directamente desde el buffer del archivo subido (sin copiar los bytes)
+    from googleapiclient.http import MediaIoBaseUpload
+    archivo_subido.seek(0)
+    media = MediaIoBaseUpload(archivo_subido, 
+                              # --- ARREGLO 3: Usar el MIME type real ---
+                              mimetype=mime_type_real,
+                              chunksize=Config.SUBIDA_CHUNK_BYTES,
+                              resumable=True)
+    
+    # Subir archivo a Google Drive, trozo a trozo
+    request = drive_service.files().create(
+        body=file_metadata,
+        media_body=media,
+        fields='id, webViewLink, name'
+    )
+    limitador = get_limitador()
+    file = None
+    while file is None:
+        # Si un trozo falla con 429/5xx, la subida sigue desde donde se quedó
+        status, file = limitador.llamar("drive", request.next_chunk)
+        if status and tarea is not None:
+            tarea.subido = status.resumable_progress
+    
+    metricas = metricas_del_hilo()
+    if metricas is not None:
+        metricas.sumar_llamada("drive.bytes_subidos", archivo_subido.size)
+    
+    get_links_por_hash()[hash_contenido] = file['webViewLink']
+    return file['webViewLink']
 
-# Definimos las columnas que esperamos leer
-COLUMN_HEADERS = ["Archivo", "Clasificación", "Comentarios", "Fecha", "Proceso", "CV_Link", "Estado_Pipeline", "Entrevistas"]
+# --- DEDUPLICACIÓN DE INFORMES POR CONTENIDO ---
+def calcular_hash(archivo_subido):
+    """SHA-256 del archivo leyendo su buffer en memoria directamente (sin copiarlo)."""
+    with archivo_subido.getbuffer() as buffer:
+        return hashlib.sha256(buffer).hexdigest()
 
-# --- ¡NUEVO! DEFINICIÓN DEL PIPELINE ---
-# Estas son las FASES de tu tablero
-PIPELINE_STAGES = [
-    "📥 Nuevo",
-    "👀 En Revisión",
-    "🗓️ Agendar Entrevista",
-    "🎤 Entrevistado",
-    "✅ Aceptado"
-]
-RECHAZADO_STAGE = "❌ Rechazado"
+@st.cache_resource
+def get_links_por_hash():
+    """Hash de contenido -> 'webViewLink' de lo ya subido por este servidor."""
+    return {}
 
-# Fases donde se permiten subir entrevistas
-FASES_ENTREVISTA = ["🗓️ Agendar Entrevista", "🎤 Entrevistado", "✅ Aceptado"]
+def sigue_en_drive(drive_service, link):
+    """False si el archivo del enlace ya no existe o está en la papelera."""
+    id_archivo = id_de_drive(link)
+    if id_archivo is None:
+        return False
+    peticion = drive_service.files().get(fileId=id_archivo, fields='trashed')
+    try:
+        archivo = get_limitador().llamar("drive", peticion.execute, clave=f"existe:{id_archivo}")
+    except Exception as e:
+        if codigo_http(e) == 404:
+            return False
+        raise
+    return not archivo.get('trashed', False)
 
-# Traemos tus categorías para usar los colores
-CATEGORIES = [
-    {"label": "🌟 Óptimo", "color": "#D4ADFC"},
-    {"label": "✅ Adecuado", "color": "#A0E7E5"},
-]
+def buscar_por_hash(drive_service, hash_contenido):
+    """Link de un archivo de Drive con ese mismo contenido (o None si no hay)."""
+    links = get_links_por_hash()
+    link = links.get(hash_contenido)
+    if link is not None:
+        # Alguien pudo borrarlo (o mandarlo a la papelera) desde Drive: no reutilizar un link muerto
+        if sigue_en_drive(drive_service, link):
+            return link
+        links.pop(hash_contenido, None)
+    
+    # Consulta por 'appProperties' (la guardamos al subir cada informe)
+    consulta = drive_service.files().list(
+        q=f"appProperties has {{ key='sha256' and value='{hash_contenido}' }} and trashed = false",
+        fields='files(id, webViewLink)',
+        pageSize=1,
+        spaces='drive'
+    )
+    resultado = get_limitador().llamar("drive", consulta.execute, clave=f"hash:{hash_contenido}")
+    archivos = resultado.get('files', [])
+    if not archivos:
+        return None
+    links[hash_contenido] = archivos[0]['webViewLink']
+    return links[hash_contenido]
 
-# ========== CONEXIÓN A GOOGLE SHEETS (OAuth) ==========
+# --- SUBIDAS EN SEGUNDO PLANO ---
+class TareaSubida:
+    """Un archivo camino de Drive. La actualiza el hilo que lo sube; la lee el panel de progreso."""
+    def __init__(self, candidato_archivo, archivo_subido):
+        self.candidato = candidato_archivo
+        self.archivo = archivo_subido
+        self.nombre = archivo_subido.name
+        self.total = archivo_subido.size
+        self.subido = 0
+        self.estado = "cola"  # "cola" -> "subiendo" -> "ok" / "error"
+        self.error = None
+        self.link = None
+        self.reutilizado = False  # True si ya estaba en Drive y no se volvió a subir
 
-@st.cache_resource(ttl=600)
-def get_google_creds(token_file):
-    """Lee el token.json. Si no existe, falla."""
-    creds = None
-    if os.path.exists(token_file):
-        creds = Credentials.from_authorized_user_file(token_file, SCOPES)
-    else:
-        # Este error ahora solo debería aparecer en local si borras el token
-        st.error(f"Error: No se encuentra el archivo de sesión '{token_file}'.")
-        st.info("Asegúrate de que tus 'Secrets' de Streamlit Cloud están bien configurados.")
-        return None
-    
-    # Refrescar si está caducado
-    if creds and creds.expired and creds.refresh_token:
+    @property
+    def progreso(self):
+        if self.estado == "ok":
+            return 1.0
+        return min(self.subido / self.total, 1.0) if self.total else 0.0
+
+class LoteSubidas:
+    """
+    Archivos de UN candidato enviados juntos. Cuando terminan todos, se guarda
+    'Entrevistas' con una sola escritura (no una por archivo).
+    """
+    def __init__(self, candidato_archivo, tareas, almacen):
+        self._lock = threading.Lock()
+        self.candidato = candidato_archivo
+        self.tareas = tareas
+        self.almacen = almacen
+        self._sin_terminar = len(tareas)
+        self.terminado = False
+        self.error_guardado = None
+        self.avisado = False
+
+    def tarea_terminada(self):
+        with self._lock:
+            self._sin_terminar -= 1
+            ultimo = self._sin_terminar == 0
+        if ultimo:
+            self._guardar()
+
+    def _guardar(self):
+        subidas = [(t.link, t.nombre) for t in self.tareas if t.estado == "ok"]
         try:
-            creds.refresh(Request())
-            # Guardar el token refrescado (solo en local)
-            if os.access('.', os.W_OK): # Comprobar si tenemos permisos de escritura
-                with open(token_file, 'w') as token:
-                    token.write(creds.to_json())
+            if subidas and self.almacen is None:
+                raise ConnectionError("Error de conexión con la base de datos")
+            if subidas and not self.almacen.agregar_entrevistas(self.candidato, subidas):
+                self.error_guardado = f"No se encontró a '{self.candidato}' para guardar sus entrevistas."
         except Exception as e:
-            st.error(f"Error al refrescar el token: {e}. Vuelve a autenticarte localmente o revisa los 'Secrets'.")
-            return None
-    
-    return creds
+            self.error_guardado = str(e)
+        self.terminado = True
 
-@st.cache_resource(ttl=600)
-def connect_to_gsheet(_creds):
-    """Conecta con Google Sheets."""
-    if _creds is None: return None
+def _subir_en_segundo_plano(tarea, lote, clientes_drive, creds, metricas=None):
+    usar_metricas(metricas)  # Lo que se suba cuenta para la sesión que lo pidió
     try:
-        gc = gspread.authorize(_creds)
-        sh = gc.open(Config.GSHEET_NAME)
-        worksheet = sh.sheet1
-        return worksheet
+        tarea.estado = "subiendo"
+        # Cliente de Drive de este hilo (ya construido y con la conexión abierta)
+        drive_service = clientes_drive.servicio(creds)
+        tarea.link = subir_entrevista(tarea.candidato, tarea.archivo, drive_service, tarea)
+        tarea.estado = "ok"
     except Exception as e:
-        st.error(f"Error conectando con Google Sheets: {e}")
-        return None
+        tarea.estado = "error"
+        tarea.error = str(e)
+    finally:
+        tarea.archivo = None  # Soltar el PDF en cuanto se ha subido
+        lote.tarea_terminada()
 
-@st.cache_data(ttl=60) # Cachear los datos por 60 segundos
-def load_data_from_gsheet(_worksheet):
-    """Lee TODOS los datos de Google Sheets y los devuelve como DataFrame."""
-    try:
-        data = _worksheet.get_all_records()
-        df = pd.DataFrame(data)
-        
-        if df.empty:
-            return pd.DataFrame(columns=COLUMN_HEADERS)
-        
-        for col in COLUMN_HEADERS:
-            if col not in df.columns:
-                df[col] = pd.NA
-                
-        return df[COLUMN_HEADERS]
-        
-    except Exception as e:
-        st.error(f"Error leyendo el DataFrame de Google Sheets: {e}")
-        return pd.DataFrame(columns=COLUMN_HEADERS)
+@st.cache_resource
+def get_pool_subidas():
+    """Hilos compartidos por todas las sesiones para subir entrevistas."""
+    return ThreadPoolExecutor(max_workers=Config.SUBIDA_HILOS, thread_name_prefix="subida")
 
-# --- LÓGICA DE ESCRITURA (MOVER CANDIDATO) ---
-def mover_candidato(candidato_archivo, nuevo_estado):
-    """Encuentra al candidato en el GSheet y actualiza su estado."""
-    try:
-        # Volver a conectar (no se puede pasar 'worksheet' como arg a on_click)
-        creds = get_google_creds(Config.GDRIVE_TOKEN_FILE)
-        worksheet = connect_to_gsheet(creds)
-        if worksheet is None:
-            st.error("Error de conexión al mover candidato.")
-            return
+def encolar_subidas(candidato_archivo, archivos_subidos):
+    """Manda los PDFs a subir en segundo plano y vuelve al momento."""
+    creds = get_google_creds(Config.GDRIVE_TOKEN_FILE)
+    tareas = [TareaSubida(candidato_archivo, archivo) for archivo in archivos_subidos]
+    lote = LoteSubidas(candidato_archivo, tareas, get_almacen())
+    st.session_state.setdefault('subidas', []).append(lote)
+    
+    pool = get_pool_subidas()
+    clientes_drive = get_clientes_drive()
+    for tarea in tareas:
+        pool.submit(_subir_en_segundo_plano, tarea, lote, clientes_drive, creds, get_metricas_sesion())
 
-        # 1. Encontrar al candidato por su nombre de archivo
-        cell = worksheet.find(candidato_archivo)
-        if not cell:
-            st.error(f"Error: No se encontró a '{candidato_archivo}' para moverlo.")
-            return
-            
-        # 2. Encontrar la columna "Estado_Pipeline"
-        headers = worksheet.row_values(1)
+# --- ★★★ FIN: FUNCIÓN 'SUBIR ENTREVISTA' ARREGLADA ★★★ ---
+
+
+# ========== EXPORTAR SHORTLIST (EXCEL + INFORMES EN .ZIP) ==========
+
+COLUMNAS_EXPORTACION = ["Archivo", "Clasificación", "Estado_Pipeline", "Fecha", "Comentarios", "CV_Link", "Entrevistas"]
+ANCHOS_EXPORTACION = {"A": 40, "B": 22, "C": 22, "D": 12, "E": 60, "F": 45, "G": 60}
+
+def escribir_excel(df, destino, titulo="Shortlist"):
+    """
+    Escribe los candidatos en un .xlsx con openpyxl en modo 'write_only':
+    las filas se vuelcan según se añaden, sin montar la hoja entera en memoria.
+    """
+    from openpyxl import Workbook
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(titulo[:31])  # Excel no admite nombres de hoja más largos
+    for letra, ancho in ANCHOS_EXPORTACION.items():
+        hoja.column_dimensions[letra].width = ancho
+    hoja.append(COLUMNAS_EXPORTACION)
+    
+    i_fecha = COLUMNAS_EXPORTACION.index("Fecha")
+    i_entrevistas = COLUMNAS_EXPORTACION.index("Entrevistas")
+    for fila in df.reindex(columns=COLUMNAS_EXPORTACION).itertuples(index=False, name=None):
+        fila = [None if not isinstance(valor, tuple) and pd.isna(valor) else valor for valor in fila]
+        if fila[i_fecha] is not None:
+            fila[i_fecha] = fila[i_fecha].date()
+        fila[i_entrevistas] = "\n".join(f"{nombre}: {link}" for link, nombre in fila[i_entrevistas] or ())
+        hoja.append(fila)
+    libro.save(destino)
+
+def id_de_drive(link):
+    """ID de archivo de un enlace de Drive ('.../d/<id>/view' o '...?id=<id>'); None si no lo es."""
+    encontrado = re.search(r"/d/([\w-]+)|[?&]id=([\w-]+)", link or "")
+    return encontrado and (encontrado.group(1) or encontrado.group(2))
+
+def descargar_informe(link, destino, drive_service):
+    """Baja un archivo de Drive a 'destino' (un archivo abierto) trozo a trozo."""
+    id_archivo = id_de_drive(link)
+    if id_archivo is None:
+        raise ValueError(f"No es un enlace de Drive: {link}")
+    from googleapiclient.http import MediaIoBaseDownload
+    peticion = drive_service.files().get_media(fileId=id_archivo)
+    descarga = MediaIoBaseDownload(destino, peticion, chunksize=Config.EXPORTACION_CHUNK_BYTES)
+    limitador = get_limitador()
+    terminado = False
+    while not terminado:
+        # Si un trozo falla con 429/5xx, la descarga sigue desde donde se quedó
+        _, terminado = limitador.llamar("drive", descarga.next_chunk)
+    
+    metricas = metricas_del_hilo()
+    if metricas is not None:
+        metricas.sumar_llamada("drive.bytes_descargados", destino.tell())
+
+def _descargar_a_disco(link, clientes_drive, creds, metricas=None):
+    """Tarea del pool: deja el informe en un archivo temporal y devuelve su ruta."""
+    usar_metricas(metricas)
+    with tempfile.NamedTemporaryFile(prefix="informe_", suffix=".pdf", delete=False) as temporal:
         try:
-            col_index = headers.index("Estado_Pipeline") + 1 # +1 porque gspread empieza en 1
-        except ValueError:
-            st.error("Error: No se encontró la columna 'Estado_Pipeline' en el Google Sheet.")
-            return
-            
-        # 3. Actualizar la celda
-        worksheet.update_cell(cell.row, col_index, nuevo_estado)
-        
-        # 4. Limpiar caché
-        st.cache_data.clear() # Borra la caché de datos para forzar la recarga
-        st.success(f"Movido '{candidato_archivo}' a '{nuevo_estado}'!")
-        # Streamlit recarga automáticamente después de un callback
+            descargar_informe(link, temporal, clientes_drive.servicio(creds))
+        except BaseException:
+            temporal.close()
+            os.remove(temporal.name)
+            raise
+    return temporal.name
 
-    except Exception as e:
-        st.error(f"Error al mover candidato: {e}")
+@st.cache_resource
+def get_pool_descargas():
+    """Hilos compartidos por todas las sesiones para bajar informes de Drive."""
+    return ThreadPoolExecutor(max_workers=Config.EXPORTACION_HILOS, thread_name_prefix="descarga")
 
-# --- ★★★ INICIO: FUNCIÓN 'SUBIR ENTREVISTA' ARREGLADA ★★★ ---
-def subir_entrevista(candidato_archivo, archivo_subido):
-    """Sube un informe de entrevista y lo asocia al candidato"""
-    try:
-        creds = get_google_creds(Config.GDRIVE_TOKEN_FILE)
-        
-        # Conectar a Google Drive
-        drive_service = build('drive', 'v3', credentials=creds)
-        
-        # --- ARREGLO 1: Obtener el MIME type real del archivo ---
-        mime_type_real = archivo_subido.type
-        
-        # Preparar metadatos del archivo
-        file_metadata = {
-            'name': f"Entrevista_{candidato_archivo}_{archivo_subido.name}",
-            # --- ARREGLO 2: Usar el MIME type real ---
-            'mimeType': mime_type_real 
-        }
-        
-        # Si se especificó una carpeta, usarla
-        if Config.ENTREVISTAS_FOLDER_ID:
-            file_metadata['parents'] = [Config.ENTREVISTAS_FOLDER_ID]
-        
-        # Convertir el archivo subido a bytes
-        file_bytes = archivo_subido.getvalue()
-        media = MediaIoBaseUpload(io.BytesIO(file_bytes), 
-                                  # --- ARREGLO 3: Usar el MIME type real ---
-                                  mimetype=mime_type_real,
-                                  resumable=True)
-        
-        # Subir archivo a Google Drive
-        file = drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id, webViewLink, name'
-        ).execute()
-        
-        # Actualizar Google Sheets con el nuevo enlace
-        worksheet = connect_to_gsheet(creds)
-        cell = worksheet.find(candidato_archivo)
-        if cell:
-            # Encontrar columna de Entrevistas
-            headers = worksheet.row_values(1)
-            try:
-                col_index = headers.index("Entrevistas") + 1
-            except ValueError:
-                # Si la columna no existe, crearla
-                col_index = len(headers) + 1
-                worksheet.update_cell(1, col_index, "Entrevistas")
-            
-            # Obtener entrevistas existentes
-            entrevistas_actuales = worksheet.cell(cell.row, col_index).value or ""
-            nueva_entrevista = f"{file['webViewLink']}|{archivo_subido.name}"
+def nombre_seguro(texto):
+    """Nombre válido para un archivo dentro del .zip (sin barras ni caracteres raros)."""
+    return re.sub(r'[\\/:*?"<>|]+', "_", str(texto)).strip(" .") or "sin_nombre"
+
+def generar_zip_shortlist(df, creds, titulo="Shortlist", metricas=None):
+    """
+    .zip con 'shortlist.xlsx' y los informes de entrevista de cada candidato (en bytes).
+    Los PDFs se bajan en paralelo a archivos temporales y se meten en el .zip (otro
+    temporal en disco) según van llegando. Streamlit se queda el resultado en memoria
+    para servirlo, así que no pasa de 'Config.EXPORTACION_MAX_MB': al llegar al límite
+    se cancelan las descargas que faltan y se listan en 'OMITIDOS.txt'.
+    Se ejecuta fuera del script (al pulsar la descarga): NO puede usar 'st.*'.
+    """
+    limite = Config.EXPORTACION_MAX_MB * 1024 * 1024
+    with tempfile.TemporaryFile(suffix=".zip") as salida:  # Se borra solo al cerrarlo
+        with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+            with archivo_zip.open("shortlist.xlsx", "w") as excel:
+                escribir_excel(df, excel, titulo)
             
-            # Agregar nueva entrevista (separadas por ;)
-            if entrevistas_actuales:
-                entrevistas_actuales += f";{nueva_entrevista}"
-            else:
-                entrevistas_actuales = nueva_entrevista
-                
-            worksheet.update_cell(cell.row, col_index, entrevistas_actuales)
+            # (link, ruta dentro del .zip) de cada informe, sin repetir rutas
+            informes = []
+            rutas = set()
+            for candidato, entrevistas in zip(df['Archivo'], df['Entrevistas']):
+                carpeta = nombre_seguro(os.path.splitext(str(candidato))[0])
+                for link, nombre in entrevistas or ():
+                    ruta = f"Informes/{carpeta}/{nombre_seguro(nombre)}"
+                    base, extension = os.path.splitext(ruta)
+                    n = 2
+                    while ruta in rutas:
+                        ruta, n = f"{base} ({n}){extension}", n + 1
+                    rutas.add(ruta)
+                    informes.append((link, ruta))
             
-        st.success(f"✅ Entrevista subida para {candidato_archivo}")
-        st.cache_data.clear()  # Forzar recarga de datos
-        
-    except Exception as e:
-        st.error(f"❌ Error subiendo entrevista: {e}")
+            errores = []
+            omitidos = []
+            if informes and creds is None:
+                errores.append("Sin credenciales de Google: no se han podido descargar los informes.")
+            elif informes:
+                pool = get_pool_descargas()
+                clientes_drive = get_clientes_drive()
+                futuros = {
+                    pool.submit(_descargar_a_disco, link, clientes_drive, creds, metricas): ruta
+                    for link, ruta in informes
+                }
+                for futuro in as_completed(futuros):
+                    ruta = futuros[futuro]
+                    try:
+                        temporal = futuro.result()
+                    except CancelledError:
+                        omitidos.append(ruta)
+                        continue
+                    except Exception as e:
+                        errores.append(f"{ruta}: {e}")
+                        continue
+                    try:
+                        if salida.tell() + os.path.getsize(temporal) > limite:
+                            omitidos.append(ruta)
+                            for pendiente in futuros:
+                                pendiente.cancel()  # Las que ya están bajando terminan y se descartan
+                            continue
+                        archivo_zip.write(temporal, ruta)
+                    finally:
+                        os.remove(temporal)
+            if errores:
+                archivo_zip.writestr("ERRORES.txt", "No se pudieron incluir:\n" + "\n".join(sorted(errores)))
+            if omitidos:
+                archivo_zip.writestr(
+                    "OMITIDOS.txt",
+                    f"El .zip llegó al máximo de {Config.EXPORTACION_MAX_MB} MB. No se incluyeron:\n"
+                    + "\n".join(sorted(omitidos))
+                )
+        salida.seek(0)
+        return salida.read()
 
-# --- ★★★ FIN: FUNCIÓN 'SUBIR ENTREVISTA' ARREGLADA ★★★ ---
+def panel_exportacion(df, proceso, fase):
+    """Descargas de la shortlist de la fase que se ve: Excel solo, o Excel + informes."""
+    titulo = f"{proceso} - {fase}"
+    nombre = nombre_seguro(f"Shortlist {proceso} {fase}")
+    n_informes = sum(len(entrevistas or ()) for entrevistas in df['Entrevistas'])
+    
+    def excel():
+        salida = io.BytesIO()
+        escribir_excel(df, salida, titulo)
+        return salida.getvalue()
+    
+    with st.expander(f"📤 Exportar shortlist ({len(df)} candidato(s))"):
+        col_excel, col_zip = st.columns(2)
+        with col_excel:
+            st.download_button(
+                "⬇️ Excel", data=excel, file_name=f"{nombre}.xlsx", key="exportar_excel",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore", use_container_width=True
+            )
+        with col_zip:
+            if n_informes:
+                creds = get_google_creds(Config.GDRIVE_TOKEN_FILE)
+                metricas = get_metricas_sesion()
+                # El .zip se genera al pulsar, en otro hilo (no bloquea el tablero)
+                st.download_button(
+                    f"⬇️ Excel + {n_informes} informe(s) (.zip, máx. {Config.EXPORTACION_MAX_MB} MB)",
+                    data=lambda: generar_zip_shortlist(df, creds, titulo, metricas),
+                    file_name=f"{nombre}.zip", mime="application/zip", key="exportar_zip",
+                    on_click="ignore", use_container_width=True
+                )
+            else:
+                st.caption("Sin informes de entrevista en esta fase.")
 
 
 # ========== INTERFAZ "MODO CARRERA" ==========
 
+@st.fragment
 def mostrar_ficha_candidato(candidato_row, current_stage_index):
     """
     Dibuja la "Ficha de Jugador" para un candidato, CON BOTONES DE ACCIÓN.
+    Es un fragmento: sus botones y su formulario solo vuelven a ejecutar ESTA ficha,
+    no la página entera.
     """
     
     # 1. Obtener los datos de la fila
@@ -271,7 +2368,15 @@ def mostrar_ficha_candidato(candidato_row, current_stage_index):
     clasificacion = candidato_row.get("Clasificación", "")
     comentarios = candidato_row.get("Comentarios", "")
     link_cv = candidato_row.get("CV_Link", "#")
-    entrevistas = candidato_row.get("Entrevistas", "")
+    entrevistas = candidato_row.get("Entrevistas", ())
+    
+    # Si se acaba de mover desde esta ficha, se muestra ya movida (el tablero se pone
+    # al día en la siguiente recarga completa)
+    movido_a = st.session_state.get('fichas_movidas', {}).get(nombre)
+    if movido_a:
+        with st.container(border=True):
+            st.markdown(f"~~**{nombre}**~~ → **{movido_a}**")
+        return
     
     # 2. Obtener el color de tu clasificación personal
     color = "#CCCCCC" # Color por defecto
@@ -286,7 +2391,8 @@ def mostrar_ficha_candidato(candidato_row, current_stage_index):
         # Cabecera: Nombre y Clasificación
         col_header = st.columns([4, 1])
         with col_header[0]:
-            st.markdown(f"**{nombre}**")
+            # La casilla sirve para las acciones en lote de la barra superior
+            st.checkbox(f"**{nombre}**", key=f"sel_{nombre}")
         with col_header[1]:
             st.markdown(
                 f'<span style="background-color: {color}; color: #333; padding: 4px 10px; border-radius: 15px; font-size: 0.8rem; font-weight: bold;">{clasificacion}</span>',
@@ -302,15 +2408,12 @@ def mostrar_ficha_candidato(candidato_row, current_stage_index):
             st.link_button("📄 Ver CV", link_cv)
         
         # --- NUEVO: MOSTRAR ENTREVISTAS EXISTENTES ---
-        # Manejo seguro de valores NA/nulos de pandas
-        if pd.notna(entrevistas) and entrevistas and str(entrevistas).strip():
+        # (Ya vienen como tupla de (link, nombre) desde la carga de datos)
+        if entrevistas:
             st.markdown("---")
             st.markdown("**📋 Informes de Entrevista:**")
-            entrevistas_lista = [e for e in str(entrevistas).split(";") if e.strip()]
-            for i, entrevista in enumerate(entrevistas_lista):
-                if "|" in entrevista:
-                    link, nombre_archivo = entrevista.split("|", 1)
-                    st.markdown(f"• [{nombre_archivo}]({link})")
+            for link, nombre_archivo in entrevistas:
+                st.markdown(f"• [{nombre_archivo}]({link})")
         
         # --- NUEVO: SUBIR NUEVA ENTREVISTA (solo en fases de entrevista) ---
         if st.session_state.selected_phase in FASES_ENTREVISTA:
@@ -318,10 +2421,11 @@ def mostrar_ficha_candidato(candidato_row, current_stage_index):
             st.markdown("**Subir nuevo informe de entrevista:**")
             
             # Usamos un form para evitar reruns automáticos
-            with st.form(key=f"form_entrevista_{nombre}"):
-                archivo_entrevista = st.file_uploader(
-                    "Seleccionar PDF de entrevista",
+            with st.form(key=f"form_entrevista_{nombre}", clear_on_submit=True):
+                archivos_entrevista = st.file_uploader(
+                    "Seleccionar PDF(s) de entrevista",
                     type=["pdf"],
+                    accept_multiple_files=True,
                     key=f"entrevista_{nombre}"
                 )
                 
@@ -331,11 +2435,11 @@ def mostrar_ficha_candidato(candidato_row, current_stage_index):
                     use_container_width=True
                 )
                 
-                if submit_button and archivo_entrevista is not None:
-                    with st.spinner("Subiendo entrevista..."):
-                        subir_entrevista(nombre, archivo_entrevista)
-                        st.rerun()
-                elif submit_button and archivo_entrevista is None:
+                if submit_button and archivos_entrevista:
+                    # Se suben en segundo plano: el progreso sale en el sidebar
+                    encolar_subidas(nombre, archivos_entrevista)
+                    st.toast(f"📤 Subiendo {len(archivos_entrevista)} archivo(s) de {nombre}...")
+                elif submit_button:
                     st.warning("Por favor, selecciona un archivo PDF primero.")
         
         # --- Botones de Acción ---
@@ -366,6 +2470,267 @@ def mostrar_ficha_candidato(candidato_row, current_stage_index):
                 type="secondary"
             )
 
+@st.fragment(run_every=max(Config.SEGUNDOS_LOTE_ESCRITURA, 1))
+def panel_cambios_pendientes():
+    """
+    Sidebar: cambios pendientes de guardar y escrituras fallidas.
+    Se refresca solo (sin recargar la página) para enseñar lo que el hilo de guardado ya ha hecho.
+    """
+    cola = get_cola_escrituras()
+    
+    if cola.guardados:
+        st.caption(f"💾 {cola.guardados} cambio(s) guardado(s)")
+        cola.guardados = 0
+    
+    if Config.ALMACEN != "sqlite" and get_limitador().margen("sheets") < 0.25:
+        st.caption("🐢 Mucho tráfico con Google: los cambios pueden tardar un poco más en guardarse.")
+    
+    if cola.pendientes:
+        st.markdown(f"⏳ **{len(cola.pendientes)} cambio(s) pendiente(s) de guardar**")
+        st.button(
+            "💾 Aplicar cambios",
+            key="aplicar_cambios",
+            on_click=aplicar_cambios_pendientes,
+            use_container_width=True
+        )
+    
+    if cola.fallidos:
+        st.error(f"No se pudieron guardar {len(cola.fallidos)} cambio(s):")
+        for archivo, estado, motivo in cola.fallidos:
+            st.caption(f"• {archivo} → {estado}: {motivo}")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button(
+                "🔁 Reintentar",
+                key="reintentar_fallidos",
+                on_click=reintentar_fallidos,
+                use_container_width=True
+            )
+        with col2:
+            st.button(
+                "Descartar",
+                key="descartar_fallidos",
+                on_click=descartar_fallidos,
+                use_container_width=True
+            )
+    
+    # Si algo falló, el tablero (que lo mostraba ya movido) tiene que redibujarse
+    fallos_vistos = st.session_state.get('fallos_vistos', 0)
+    st.session_state.fallos_vistos = len(cola.fallidos)
+    if len(cola.fallidos) > fallos_vistos:
+        st.rerun()
+
+def ir_a_candidato(proceso, fase):
+    """Lleva el tablero al proceso y la fase de un resultado del buscador."""
+    st.session_state.proceso_seleccionado = proceso
+    st.session_state.selected_phase = fase
+
+def buscador_candidatos(almacen):
+    """Sidebar: busca por nombre, comentario o informe en TODOS los procesos."""
+    # (Con una pestaña por proceso se busca solo por nombre: ver 'TablaBusqueda')
+    pista = "Nombre..." if Config.ALMACEN == "gsheet_procesos" else "Nombre, comentario..."
+    consulta = st.text_input("🔎 Buscar candidato", key="busqueda", placeholder=pista)
+    if len(consulta.strip()) < 2:
+        return
+    
+    indice = get_indice_busqueda(type(almacen).__name__, almacen.version_busqueda(), almacen)
+    pendientes = get_cola_escrituras().visibles()
+    
+    def fases(archivos):
+        # La fase guardada, con los cambios aún no guardados ya aplicados
+        actuales = almacen.estados(archivos)
+        actuales.update((archivo, pendientes[archivo]) for archivo in archivos if archivo in pendientes)
+        return actuales
+    
+    resultados, total = indice.buscar(consulta, Config.RESULTADOS_BUSQUEDA, fases)
+    if not resultados:
+        st.caption("Sin resultados.")
+        return
+    
+    st.caption(f"{total} resultado(s)" + (f", se muestran {len(resultados)}" if total > len(resultados) else ""))
+    fases_tablero = PIPELINE_STAGES + [RECHAZADO_STAGE]
+    for i, candidato in enumerate(resultados):
+        fase = candidato['Estado_Pipeline']
+        st.markdown(f"**{candidato['Archivo']}**  \n{candidato['Proceso']} · {fase or 'Sin fase'}")
+        if fase in fases_tablero:
+            st.button(
+                "Ver en el tablero",
+                key=f"ir_{i}_{candidato['Archivo']}",
+                on_click=ir_a_candidato,
+                args=(candidato['Proceso'], fase),
+                use_container_width=True
+            )
+
+def panel_rendimiento(metricas):
+    """Sidebar (solo con 'Config.MODO_DEPURACION'): dónde se fue el tiempo de la última recarga."""
+    with st.expander("🛠️ Rendimiento", expanded=False):
+        ultima = metricas.ultima
+        if ultima is None:
+            st.caption("Aún no ha terminado ninguna recarga.")
+        else:
+            fases = ultima["fases"]
+            st.markdown(f"**Última recarga: {ultima['total'] * 1000:.0f} ms**")
+            st.caption("('fichas' va incluido en 'tablero')")
+            st.dataframe(
+                pd.DataFrame({
+                    "ms": [round(seg * 1000, 1) for seg in fases.values()],
+                    "veces": [ultima["veces"][fase] for fase in fases],
+                }, index=list(fases)),
+                use_container_width=True
+            )
+            if ultima["llamadas"]:
+                st.caption("Llamadas a la API: " + ", ".join(f"{m} ×{n}" for m, n in ultima["llamadas"].items()))
+            st.caption(f"Bytes recibidos/enviados: {ultima['bytes']:,}")
+        
+        st.caption(
+            f"Sesión {metricas.id}: {metricas.recargas} recargas, "
+            f"{sum(metricas.llamadas_totales.values())} llamadas, {metricas.bytes_totales:,} bytes"
+        )
+        limitador = get_limitador()
+        st.caption(
+            "Cuota libre — " + ", ".join(f"{api}: {limitador.margen(api):.0%}" for api in limitador.cubetas)
+            + f" | reintentos: {limitador.reintentos}, lecturas agrupadas: {limitador.agrupadas}"
+        )
+
+@st.fragment(run_every=3)
+def aviso_datos_desactualizados(almacen, version_mostrada):
+    """
+    Marca de 'datos desactualizados' encima del tablero. Cuando llegan los datos
+    nuevos (o se resuelve el problema), recarga la página entera para mostrarlos.
+    """
+    aviso = almacen.aviso_datos()
+    if aviso is None or almacen.version() != version_mostrada:
+        st.rerun()
+    st.warning(f"🕒 {aviso}")
+
+@st.fragment(run_every=2)
+def panel_subidas():
+    """
+    Sidebar: progreso de las subidas en segundo plano de esta sesión. Se vuelve a dibujar
+    cada 2 s; solo se llama mientras queda algún lote sin terminar (o sin avisar).
+    """
+    lotes = st.session_state.get('subidas', [])
+    lista_subidas(lotes)
+    # Todo terminado: una recarga completa deja la lista quieta (sin este fragmento)
+    if all(lote.avisado for lote in lotes):
+        st.rerun(scope="app")
+
+def lista_subidas(lotes):
+    """Progreso de cada archivo. Avisa (una vez) de cada lote que termina."""
+    st.markdown("---")
+    st.markdown("**📤 Subidas de entrevistas**")
+    iconos = {"cola": "⏳", "subiendo": "📤", "ok": "✅", "error": "❌"}
+    recargar = False
+    for lote in lotes:
+        for tarea in lote.tareas:
+            icono = "♻️" if tarea.reutilizado else iconos[tarea.estado]
+            st.progress(tarea.progreso, text=f"{icono} {tarea.nombre} ({lote.candidato})")
+            if tarea.error:
+                st.caption(f"❌ {tarea.error}")
+        if lote.error_guardado:
+            st.caption(f"❌ {lote.error_guardado}")
+        if lote.terminado and not lote.avisado:
+            lote.avisado = True
+            n_ok = sum(t.estado == "ok" for t in lote.tareas)
+            if n_ok and not lote.error_guardado:
+                st.toast(f"✅ {n_ok} entrevista(s) subida(s) para {lote.candidato}")
+                recargar = True
+    
+    # Los datos ya traen los informes (la escritura parchea la caché): se recarga
+    # la página entera para que la ficha del candidato los muestre
+    if recargar:
+        st.rerun(scope="app")
+    
+    if all(lote.terminado for lote in lotes):
+        st.button("Limpiar lista", key="limpiar_subidas", on_click=limpiar_subidas, use_container_width=True)
+
+def limpiar_subidas():
+    st.session_state.subidas = [lote for lote in st.session_state.get('subidas', []) if not lote.terminado]
+
+def mostrar_mas(clave_limite):
+    st.session_state[clave_limite] = st.session_state.get(clave_limite, Config.TARJETAS_POR_PAGINA) + Config.TARJETAS_POR_PAGINA
+
+def limite_pagina(clave):
+    return st.session_state.get(f"limite_{clave}", Config.TARJETAS_POR_PAGINA)
+
+def registros_paginados(df, clave):
+    """
+    Devuelve (registros, restantes): solo las filas de la página actual como dicts
+    ligeros (sin 'iterrows') y cuántas quedan sin dibujar.
+    """
+    limite = limite_pagina(clave)
+    return df.head(limite).to_dict('records'), max(len(df) - limite, 0)
+
+def archivos_en_pantalla(df, clave):
+    """'Archivo' de las fichas que 'registros_paginados' dibuja ahora mismo (la misma página)."""
+    return df['Archivo'].head(limite_pagina(clave)).tolist()
+
+def boton_mostrar_mas(clave, restantes):
+    if restantes > 0:
+        st.button(
+            f"⬇️ Mostrar más ({restantes} restantes)",
+            key=f"mas_{clave}",
+            on_click=mostrar_mas,
+            args=(f"limite_{clave}",),
+            use_container_width=True
+        )
+
+def mostrar_columna_fichas(df_columna, clave, current_stage_index):
+    """Dibuja las fichas de una columna por páginas, así el coste no crece con la fase."""
+    registros, restantes = registros_paginados(df_columna, clave)
+    for candidato in registros:
+        with medir("fichas"):
+            mostrar_ficha_candidato(candidato, current_stage_index)
+    boton_mostrar_mas(clave, restantes)
+
+def barra_acciones_lote(candidatos_fase, current_stage_index):
+    """Barra con acciones para los candidatos marcados entre las fichas que se ven en pantalla."""
+    col_info, col_todos, col_ninguno = st.columns([2, 1, 1])
+    with col_info:
+        # (Las casillas están dentro de cada ficha, que se redibuja sola: por eso los
+        # botones se muestran siempre y la selección se lee al pulsarlos)
+        st.markdown("☑️ **Acciones con los candidatos marcados**")
+    with col_todos:
+        st.button("Marcar todos", key="marcar_todos", on_click=marcar_todos,
+                  args=(candidatos_fase, True), use_container_width=True)
+    with col_ninguno:
+        st.button("Quitar marcas", key="quitar_marcas", on_click=marcar_todos,
+                  args=(candidatos_fase, False), use_container_width=True)
+    
+    if current_stage_index == -1:
+        # Vista de Rechazados: solo se puede restaurar
+        st.button(
+            f"Restaurar seleccionados a '{PIPELINE_STAGES[0]}'",
+            key="lote_restaurar",
+            on_click=mover_seleccionados,
+            args=(candidatos_fase, PIPELINE_STAGES[0]),
+            use_container_width=True,
+            type="primary"
+        )
+        return
+    
+    col_mover, col_rechazar = st.columns([3, 1])
+    with col_mover:
+        if current_stage_index < len(PIPELINE_STAGES) - 1:
+            next_stage = PIPELINE_STAGES[current_stage_index + 1]
+            st.button(
+                f"Mover seleccionados a {next_stage}",
+                key="lote_mover",
+                on_click=mover_seleccionados,
+                args=(candidatos_fase, next_stage),
+                use_container_width=True,
+                type="primary"
+            )
+    with col_rechazar:
+        st.button(
+            "❌ Rechazar seleccionados",
+            key="lote_rechazar",
+            on_click=mover_seleccionados,
+            args=(candidatos_fase, RECHAZADO_STAGE),
+            use_container_width=True,
+            type="secondary"
+        )
+
 # (Traemos el CSS de la otra app para un look coherente)
 def setup_portal_design():
     st.markdown("""
@@ -439,7 +2804,29 @@ def setup_portal_design():
 
 # ========== APLICACIÓN PRINCIPAL (PORTAL DE CLIENTE) ==========
 
+def configurar_log():
+    """
+    Salida del log 'mapa_talento' (Streamlit solo configura los suyos: sin esto, lo que
+    no es un aviso se pierde). El manejador se añade una vez; el nivel, en cada recarga.
+    """
+    if not logger.handlers:
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(manejador)
+        logger.propagate = False  # Que no salga dos veces si alguien configura el log raíz
+    logger.setLevel(Config.NIVEL_LOG)
+
 def main_portal():
+    """Dibuja el portal midiendo cuánto tarda cada parte de la recarga."""
+    configurar_log()
+    metricas = get_metricas_sesion()
+    metricas.empezar()
+    try:
+        dibujar_portal(metricas)
+    finally:
+        metricas.cerrar_recarga()
+
+def dibujar_portal(metricas):
     
     st.set_page_config(
         page_title="Mapa de Talento",
@@ -449,77 +2836,109 @@ def main_portal():
     
     # Aplicar el mismo diseño "fresco"
     setup_portal_design()
+    metricas.marcar("inicio")
     
     # --- 1. Inicializar Estado ---
     if 'selected_phase' not in st.session_state:
         st.session_state.selected_phase = PIPELINE_STAGES[0] # Empezar en "Nuevo"
     
-    # --- 2. Conectar a la Base de Datos (Google Sheets) ---
-    creds = get_google_creds(Config.GDRIVE_TOKEN_FILE)
+    # Lo que las fichas (fragmentos) mostraban por su cuenta ya lo trae el tablero completo
+    st.session_state.fichas_movidas = {}
     
-    # (Manejo de autenticación para Streamlit Cloud)
-    if "google_creds_valid" not in st.session_state:
-        st.session_state.google_creds_valid = False
-    if creds is not None and not st.session_state.google_creds_valid:
-        st.session_state.google_creds_valid = True
-        st.rerun()
-    if not st.session_state.google_creds_valid:
-         st.error("Error de autenticación: No se pudieron cargar las credenciales.")
-         st.info("Asegúrate de que los 'Secrets' de Google en Streamlit Cloud están configurados correctamente.")
-         return
+    # --- 2. Conectar a la Base de Datos (Google Sheets o SQLite) ---
+    if Config.ALMACEN != "sqlite":
+        creds = get_google_creds(Config.GDRIVE_TOKEN_FILE)
+        
+        # (Manejo de autenticación para Streamlit Cloud)
+        if "google_creds_valid" not in st.session_state:
+            st.session_state.google_creds_valid = False
+        if creds is not None and not st.session_state.google_creds_valid:
+            st.session_state.google_creds_valid = True
+            st.rerun()
+        if not st.session_state.google_creds_valid:
+             st.error("Error de autenticación: No se pudieron cargar las credenciales.")
+             st.info("Asegúrate de que los 'Secrets' de Google en Streamlit Cloud están configurados correctamente.")
+             return
+    metricas.marcar("credenciales")
          
-    worksheet = connect_to_gsheet(creds)
+    almacen = get_almacen()
     
-    if worksheet is None:
+    if almacen is None:
         st.error("Error fatal: No se pudo conectar a la base de datos de talento.")
         return
         
-    df_completo = load_data_from_gsheet(worksheet)
+    lista_procesos = almacen.listar_procesos()
+    metricas.marcar("carga_datos")
     
-    if df_completo.empty:
+    if almacen.aviso_datos():
+        aviso_datos_desactualizados(almacen, almacen.version())
+    
+    if not lista_procesos:
         st.info("Aún no se han clasificado candidatos.")
+        if Config.ALMACEN == "sqlite":
+            st.caption(f"La base '{Config.SQLITE_PATH}' está vacía. Para copiar en ella los candidatos "
+                       "del Google Sheet: `python importar_a_sqlite.py`")
         return
         
     # --- 3. Sidebar (Filtros y Navegación) ---
     
     st.sidebar.markdown('<h1 style="text-align: left; font-size: 2.5rem; margin-bottom: 0; color: #81D4FA;">🗺️</h1>', unsafe_allow_html=True)
     st.sidebar.title("Mapa de Talento")
+    
+    # Buscador en todos los procesos
+    with st.sidebar:
+        buscador_candidatos(almacen)
+    metricas.marcar("buscador")
 
     # Filtro por Proceso
-    lista_procesos = sorted(df_completo['Proceso'].unique())
-    proceso_seleccionado = st.sidebar.selectbox("Selecciona un Proceso:", lista_procesos)
+    proceso_seleccionado = st.sidebar.selectbox("Selecciona un Proceso:", lista_procesos, key="proceso_seleccionado")
+    
+    # Índice (Proceso, Estado, Clasificación) → filas: se calcula una vez por versión de los datos
+    indice = get_indice_grupos(type(almacen).__name__, proceso_seleccionado, almacen.version(), almacen)
+    # Los cambios aún no guardados se ven ya aplicados
+    pendientes = get_cola_escrituras().visibles()
+    metricas.marcar("indice")
     
     st.sidebar.markdown("---")
     st.sidebar.subheader("Fases del Proceso")
 
-    # Botones de navegación de Fases
+    # Botones de navegación de Fases (con el nº de candidatos en cada una)
     for stage in PIPELINE_STAGES:
-        if st.sidebar.button(stage, use_container_width=True):
+        n_fase = indice.conteo(proceso_seleccionado, stage, pendientes=pendientes)
+        if st.sidebar.button(f"{stage} ({n_fase})", key=f"fase_{stage}", use_container_width=True):
             st.session_state.selected_phase = stage
     
     # Botón de Rechazados al final
     st.sidebar.markdown("---")
-    if st.sidebar.button(RECHAZADO_STAGE, use_container_width=True):
+    n_rechazados = indice.conteo(proceso_seleccionado, RECHAZADO_STAGE, pendientes=pendientes)
+    if st.sidebar.button(f"{RECHAZADO_STAGE} ({n_rechazados})", key=f"fase_{RECHAZADO_STAGE}", use_container_width=True):
         st.session_state.selected_phase = RECHAZADO_STAGE
 
+    # Cambios de fase pendientes de guardar (se guardan en lote)
+    with st.sidebar:
+        panel_cambios_pendientes()
+        lotes = st.session_state.get('subidas', [])
+        if any(not lote.avisado for lote in lotes):
+            panel_subidas()
+        elif lotes:
+            lista_subidas(lotes)
+
     # --- NUEVO: Información sobre entrevistas ---
     st.sidebar.markdown("---")
     st.sidebar.markdown("💡 **Funcionalidad nueva:**")
     st.sidebar.markdown("• **Subir entrevistas** en fases: 🗓️, 🎤, ✅")
     
-    # --- 4. Aplicar Filtros (lógica principal) ---
-    
-    df_proceso = df_completo[df_completo['Proceso'] == proceso_seleccionado].copy()
+    if Config.MODO_DEPURACION:
+        with st.sidebar:
+            panel_rendimiento(metricas)
+    metricas.marcar("sidebar")
     
-    # Solo mostrar candidatos relevantes para el cliente
-    df_cliente = df_proceso[
-        (df_proceso['Clasificación'].isin(['🌟 Óptimo', '✅ Adecuado'])) |
-        (df_proceso['Estado_Pipeline'].isin(PIPELINE_STAGES + [RECHAZADO_STAGE]))
-    ]
-    df_cliente = df_cliente[df_cliente['Estado_Pipeline'] != 'Descartado (Reclutador)']
+    # --- 4. Aplicar Filtros (lógica principal) ---
     
-    # Filtrar por la fase seleccionada en el sidebar
-    df_fase_actual = df_cliente[df_cliente['Estado_Pipeline'] == st.session_state.selected_phase].copy()
+    # Filtrar por la fase seleccionada en el sidebar. Las fases del tablero son siempre
+    # fases del cliente (nunca 'Descartado (Reclutador)'), así que basta con el índice.
+    df_fase_actual = indice.fase(proceso_seleccionado, st.session_state.selected_phase, pendientes=pendientes)
+    metricas.marcar("filtro")
     
     # --- 5. Mostrar la Página Principal (El "Tablero") ---
     
@@ -532,61 +2951,87 @@ def main_portal():
     
     st.markdown("---")
 
-    # Separar en dos columnas: Óptimos y Adecuados
-    col_optimos, col_adecuados = st.columns(2)
-    
     # Encontrar el índice del estado actual (para pasarlo a los botones)
     try:
         current_stage_index = PIPELINE_STAGES.index(st.session_state.selected_phase)
     except ValueError:
         current_stage_index = -1 # Es "Rechazado" o un estado no estándar
     
+    # Fichas de la fase (cada columna se dibuja por páginas, ver 'registros_paginados')
+    fase = st.session_state.selected_phase
+    clave_rechazados = f"{proceso_seleccionado}_{RECHAZADO_STAGE}"
+    clave_optimos = f"{proceso_seleccionado}_{fase}_optimos"
+    clave_adecuados = f"{proceso_seleccionado}_{fase}_adecuados"
+    if fase == RECHAZADO_STAGE:
+        df_exportar = df_fase_actual
+        candidatos_visibles = archivos_en_pantalla(df_fase_actual, clave_rechazados)
+    else:
+        df_optimos = indice.fase(proceso_seleccionado, fase, '🌟 Óptimo', pendientes)
+        df_adecuados = indice.fase(proceso_seleccionado, fase, '✅ Adecuado', pendientes)
+        df_exportar = df_fase_actual[
+            df_fase_actual['Clasificación'].isin([c['label'] for c in CATEGORIES])
+        ]
+        candidatos_visibles = (archivos_en_pantalla(df_optimos, clave_optimos)
+                               + archivos_en_pantalla(df_adecuados, clave_adecuados))
+    
+    # Acciones en lote sobre los candidatos marcados (solo los que se ven en pantalla);
+    # la exportación, en cambio, es de toda la fase
+    if candidatos_visibles:
+        barra_acciones_lote(candidatos_visibles, current_stage_index)
+        panel_exportacion(df_exportar, proceso_seleccionado, fase)
+        st.markdown("---")
+    
+    # --- Lógica especial para la vista de Rechazados ---
+    if st.session_state.selected_phase == RECHAZADO_STAGE:
+        st.subheader("Candidatos Rechazados por el Cliente")
+        
+        if df_fase_actual.empty:
+            st.info("No hay candidatos rechazados en este proceso.")
+        else:
+            clave = clave_rechazados
+            registros, restantes = registros_paginados(df_fase_actual, clave)
+            for candidato_row in registros:
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.checkbox(
+                        f"**{candidato_row['Archivo']}** ({candidato_row['Clasificación']})",
+                        key=f"sel_{candidato_row['Archivo']}"
+                    )
+                with col2:
+                    st.button(
+                        "Restaurar a 'Nuevo'",
+                        key=f"restore_{candidato_row['Archivo']}",
+                        on_click=mover_candidato,
+                        args=(candidato_row['Archivo'], PIPELINE_STAGES[0]),
+                        type="secondary"
+                    )
+            boton_mostrar_mas(clave, restantes)
+        metricas.marcar("tablero")
+        return
+
+    # Separar en dos columnas: Óptimos y Adecuados
+    col_optimos, col_adecuados = st.columns(2)
+    
     # --- Columna de Óptimos ---
     with col_optimos:
-        st.subheader(f"🌟 Óptimos ({len(df_fase_actual[df_fase_actual['Clasificación'] == '🌟 Óptimo'])})")
-        
-        df_optimos = df_fase_actual[df_fase_actual['Clasificación'] == '🌟 Óptimo'].copy()
+        st.subheader(f"🌟 Óptimos ({len(df_optimos)})")
         
         if df_optimos.empty:
             st.info("No hay candidatos óptimos en esta fase.")
         else:
-            df_optimos['Fecha'] = pd.to_datetime(df_optimos['Fecha'], errors='coerce')
-            df_optimos = df_optimos.sort_values(by="Fecha", ascending=False)
-            
-            for index, candidato_row in df_optimos.iterrows():
-                mostrar_ficha_candidato(candidato_row, current_stage_index)
+            # (Ya vienen ordenados por fecha, de más reciente a más antigua, desde la carga)
+            mostrar_columna_fichas(df_optimos, clave_optimos, current_stage_index)
 
     # --- Columna de Adecuados ---
     with col_adecuados:
-        st.subheader(f"✅ Adecuados ({len(df_fase_actual[df_fase_actual['Clasificación'] == '✅ Adecuado'])})")
-        
-        df_adecuados = df_fase_actual[df_fase_actual['Clasificación'] == '✅ Adecuado'].copy()
+        st.subheader(f"✅ Adecuados ({len(df_adecuados)})")
         
         if df_adecuados.empty:
             st.info("No hay candidatos adecuados en esta fase.")
         else:
-            df_adecuados['Fecha'] = pd.to_datetime(df_adecuados['Fecha'], errors='coerce')
-            df_adecuados = df_adecuados.sort_values(by="Fecha", ascending=False)
-            
-            for index, candidato_row in df_adecuados.iterrows():
-                mostrar_ficha_candidato(candidato_row, current_stage_index)
-    
-    # --- Lógica especial para la vista de Rechazados ---
-    if st.session_state.selected_phase == RECHAZADO_STAGE:
-        col_optimos.empty() # Limpiar las columnas
-        col_adecuados.empty() # Limpiar las columnas
-        st.subheader("Candidatos Rechazados por el Cliente")
-        
-        if df_fase_actual.empty:
-            st.info("No hay candidatos rechazados en este proceso.")
-        else:
-            for index, candidato_row in df_fase_actual.iterrows():
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.markdown(f"**{candidato_row['Archivo']}** ({candidato_row['Clasificación']})")
-                with col2:
-                    if st.button("Restaurar a 'Nuevo'", key=f"restore_{candidato_row['Archivo']}", type="secondary"):
-                        mover_candidato(candidato_row['Archivo'], PIPELINE_STAGES[0])
+            # (Ya vienen ordenados por fecha, de más reciente a más antigua, desde la carga)
+            mostrar_columna_fichas(df_adecuados, clave_adecuados, current_stage_index)
+    metricas.marcar("tablero")
 
 
 if __name__ == "__main__":